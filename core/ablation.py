@@ -1,14 +1,33 @@
 import os
+from functools import lru_cache
+from typing import NamedTuple
 
+@lru_cache(maxsize=1)
 def get_ablation() -> str:
     """
     Returns one of: 'none', 'no_af', 'no_diag', 'no_priority'
+    Read once per process; call reset_ablation_cache() after changing ISL_ABLATION.
     """
     v = os.environ.get("ISL_ABLATION", "none").strip().lower()
     if v not in {"none", "no_af", "no_diag", "no_priority"}:
         return "none"
     return v
 
+class AblationFlags(NamedTuple):
+    no_af: bool
+    no_diag: bool
+    no_priority: bool
+
+@lru_cache(maxsize=1)
+def ablation_flags() -> AblationFlags:
+    """The current mode as booleans, for code that branches on it several times."""
+    m = get_ablation()
+    return AblationFlags(no_af=(m == "no_af"), no_diag=(m == "no_diag"), no_priority=(m == "no_priority"))
+
+def reset_ablation_cache():
+    get_ablation.cache_clear()
+    ablation_flags.cache_clear()
+
 def is_no_af():         return get_ablation() == "no_af"
 def is_no_diag():       return get_ablation() == "no_diag"
 def is_no_priority():   return get_ablation() == "no_priority"
@@ -1,16 +1,43 @@
-from typing import Set
+from typing import Dict, Iterable, Set
 from .arguments import ArgFramework
+
+# AFs up to this many arguments are solved on an int bitmask instead of sets
+SMALL_AF_MAX = 64
+
 def grounded_extension(af: ArgFramework) -> Set[str]:
-    attacked = {b for (a,b) in af.attacks}
-    no_incoming = set(af.args.keys()) - attacked
-    return no_incoming
+    # memoized on the framework until af.mark_dirty()
+    memo = af.__dict__.get("_grounded")
+    if memo is not None and memo[0] == af._af_version:
+        return set(memo[1])
+    n = len(af.args)
+    if n <= SMALL_AF_MAX:
+        free = ~af.attacked_mask & ((1 << n) - 1)
+        ids = af.index.ids
+        ext = {ids[i] for i in range(n) if free >> i & 1}
+    else:
+        # dict_keys - frozenset -> set, done in C
+        ext = af.args.keys() - af.attacked
+    af.__dict__["_grounded"] = (af._af_version, frozenset(ext))
+    return ext
+
+def grounded_extension_incremental(old_ext: Set[str], af: ArgFramework, added_attacks: Iterable[tuple],
+                                   added_args: Iterable[str] = ()) -> Set[str]:
+    """
+    grounded_extension(af) when af is a previous framework (whose extension was old_ext)
+    plus added_args and added_attacks, with no attacks removed. The extension is the set
+    of unattacked args, so only the new edges' targets can leave it and only the new args
+    can join it: no full solve.
+    """
+    hit = {b for _, b in added_attacks}
+    ext = (set(old_ext) | {a for a in added_args if a not in af.attacked}) - hit
+    af.__dict__["_grounded"] = (af._af_version, frozenset(ext))
+    return ext
+
+def _build_priority_table(args) -> Dict[str, int]:
+    """arg id -> priority, defaulting to 0 once here instead of per edge."""
+    return {aid: getattr(a, "priority", 0) for aid, a in args.items()}
 
 def filter_attacks_by_priority(args, attacks):
     """Keep only attacks where attacker.priority >= target.priority."""
-    out = set()
-    for (attacker, target) in attacks:
-        pa = getattr(args[attacker], "priority", 0)
-        pt = getattr(args[target], "priority", 0)
-        if pa >= pt:
-            out.add((attacker, target))
-    return out
+    prio = _build_priority_table(args)
+    return {e for e in attacks if prio[e[0]] >= prio[e[1]]}
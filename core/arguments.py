@@ -1,5 +1,9 @@
-from dataclasses import dataclass
-from typing import Dict, Tuple, Set
+import itertools, sys
+from array import array
+from dataclasses import dataclass, field
+from functools import cached_property
+from operator import itemgetter
+from typing import Dict, Tuple, Set, FrozenSet, List, NamedTuple
 
 @dataclass(frozen=True)
 class ActionSpec:
@@ -23,7 +27,98 @@ class Argument:
     priority: int = 0
     deadline_ms: int = 0
 
+class AFIndex(NamedTuple):
+    """
+    Integer (SoA) view of an ArgFramework:
+      ids[i]      -> arg id; args come first (dict order), then ids that only appear in edges
+      id2idx      -> inverse of ids
+      att_idx[e], tgt_idx[e] -> endpoints of edge e
+    """
+    ids: List[str]
+    id2idx: Dict[str, int]
+    att_idx: array
+    tgt_idx: array
+
 @dataclass
 class ArgFramework:
     args: Dict[str, Argument]
     attacks: Set[tuple]
+    # bumped by mark_dirty(); solvers key their memoized results on it
+    _af_version: int = field(default=0, init=False, repr=False, compare=False)
+
+    def mark_dirty(self):
+        """Call after mutating args/attacks in place: drops every derived cache."""
+        self._af_version += 1
+        for k in ("attacked", "index", "edges_packed", "attacked_mask", "_grounded", "_plan_order"):
+            self.__dict__.pop(k, None)
+
+    @cached_property
+    def attacked(self) -> FrozenSet[str]:
+        """Targets of at least one attack (computed once per framework)."""
+        return frozenset(map(itemgetter(1), self.attacks))
+
+    @cached_property
+    def index(self) -> AFIndex:
+        # interned ids: the dict probes below (and later ones) hit the identity fast path
+        ids = [sys.intern(aid) for aid in self.args]
+        id2idx = {aid: i for i, aid in enumerate(ids)}
+        att_idx, tgt_idx = array("i"), array("i")
+        for a, b in self.attacks:
+            for x in (a, b):
+                if x not in id2idx:
+                    x = sys.intern(x)
+                    id2idx[x] = len(ids); ids.append(x)
+            att_idx.append(id2idx[a]); tgt_idx.append(id2idx[b])
+        return AFIndex(ids, id2idx, att_idx, tgt_idx)
+
+    @cached_property
+    def edges_packed(self) -> array:
+        """One int64 per edge: (attacker_idx << 32) | target_idx."""
+        ix = self.index
+        return array("q", [(a << 32) | b for a, b in zip(ix.att_idx, ix.tgt_idx)])
+
+    @cached_property
+    def attacked_mask(self) -> int:
+        """Bit i set <=> index.ids[i] is attacked."""
+        m = 0
+        for b in self.index.tgt_idx:
+            m |= 1 << b
+        return m
+
+    def extended(self, added_attacks) -> "ArgFramework":
+        """
+        New framework over self.args (which may have gained args since) plus added_attacks.
+        attacked/index already built here are carried over and appended to instead of
+        being rebuilt from every edge.
+        """
+        added = [e for e in dict.fromkeys(added_attacks) if e not in self.attacks]
+        new = ArgFramework(args=self.args, attacks=self.attacks.union(added))
+        d = self.__dict__
+        if "attacked" in d:
+            new.__dict__["attacked"] = d["attacked"].union(map(itemgetter(1), added))
+        ix = d.get("index")
+        # only valid to extend while the old ids are exactly a prefix of the (grown) args
+        if ix is not None and len(ix.ids) <= len(self.args) and all(a == b for a, b in zip(ix.ids, self.args)):
+            ids, id2idx = list(ix.ids), dict(ix.id2idx)
+            for aid in itertools.islice(self.args, len(ids), None):
+                aid = sys.intern(aid)
+                id2idx[aid] = len(ids); ids.append(aid)
+            att_idx, tgt_idx = array("i", ix.att_idx), array("i", ix.tgt_idx)
+            for a, b in added:
+                for x in (a, b):
+                    if x not in id2idx:
+                        x = sys.intern(x)
+                        id2idx[x] = len(ids); ids.append(x)
+                att_idx.append(id2idx[a]); tgt_idx.append(id2idx[b])
+            new.__dict__["index"] = AFIndex(ids, id2idx, att_idx, tgt_idx)
+        return new
+
+    def incoming(self, target_idx: int) -> List[int]:
+        """Indices of the arguments attacking target_idx."""
+        ix = self.index
+        return [a for a, b in zip(ix.att_idx, ix.tgt_idx) if b == target_idx]
+
+    def no_incoming(self) -> List[int]:
+        """Indices of arguments (in args order) that nobody attacks."""
+        hit = set(self.index.tgt_idx)
+        return [i for i in range(len(self.args)) if i not in hit]
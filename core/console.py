@@ -31,6 +31,8 @@ def _safe_print_line(s: str):
 
 def enable_utf8_stdout():
     """Best-effort: avoid UnicodeEncodeError on Windows consoles."""
+    global _ASCII_ICONS
+    _ASCII_ICONS = False  # stdout may be rewrapped below: try the emoji again
     if os.name == "nt":
         # If stdout is missing/closed, try to restore from __stdout__
         if not getattr(sys, "stdout", None):
@@ -46,24 +48,33 @@ def enable_utf8_stdout():
             # Leave stdout as-is if wrapping fails
             pass
 
-def emit_ok(msg: str):
+_EMOJI = ("✅ ", "❌ ", "ℹ️ ")
+_ASCII = ("[OK] ", "[FAIL] ", "[i] ")
+# Set once stdout has refused to encode an emoji: later lines go straight to ASCII
+# instead of failing again (reset by enable_utf8_stdout)
+_ASCII_ICONS = False
+
+def _emit(kind: int, msg: str):
     # Try emoji first; fallback to ASCII on any failure (encoding or closed stream)
-    try:
-        _safe_print_line("✅ " + msg)
-    except Exception:
-        _safe_print_line("[OK] " + msg)
+    global _ASCII_ICONS
+    if not _ASCII_ICONS:
+        try:
+            print(_EMOJI[kind] + msg)
+            return
+        except UnicodeEncodeError:
+            _ASCII_ICONS = True
+        except Exception:
+            pass
+    _safe_print_line(_ASCII[kind] + msg)
+
+def emit_ok(msg: str):
+    _emit(0, msg)
 
 def emit_fail(msg: str):
-    try:
-        _safe_print_line("❌ " + msg)
-    except Exception:
-        _safe_print_line("[FAIL] " + msg)
+    _emit(1, msg)
 
 def emit_info(msg: str):
-    try:
-        _safe_print_line("ℹ️ " + msg)
-    except Exception:
-        _safe_print_line("[i] " + msg)
+    _emit(2, msg)
 
 def emit_line(msg: str = ""):
     """Print a neutral line robustly (no icon)."""
@@ -1,15 +1,93 @@
-import json, time, csv
-def log_event(fp, kind: str, data: dict):
-    fp.write(json.dumps({"ts": time.time(), "kind": kind, "data": data}) + "\n")
-    fp.flush()
+import json, time, csv, os, gzip
+from pathlib import Path
 
-def export_csv(path, rows, header):
+try:
+    import orjson
+except Exception:  # optional speedup; stdlib json otherwise
+    orjson = None
+
+def _dumps(obj) -> str:
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+        except TypeError:
+            pass  # something orjson can't encode; let json decide
+    return json.dumps(obj)
+
+def write_json(path, obj):
+    """
+    Write obj as a JSON document (orjson when available: one C pass, bytes straight to disk).
+    A path ending in .gz is written gzip-compressed (level 1).
+    """
+    data = None
+    if orjson is not None:
+        try:
+            data = orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass
+    if data is None:
+        data = json.dumps(obj).encode("utf-8")
+    if str(path).endswith(".gz"):
+        with gzip.open(path, "wb", compresslevel=1) as g:
+            g.write(data)
+    else:
+        Path(path).write_bytes(data)
+
+def read_json(path):
+    """Parse a JSON file from its raw bytes (orjson when available; json.loads accepts bytes too)."""
+    data = Path(path).read_bytes()
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+# Flush the log every K events (0 = leave it to the file buffer / close)
+_FLUSH_EVERY = int(os.environ.get("ISL_LOG_FLUSH_EVERY", "0") or 0)
+_since_flush = 0
+
+# ISL_LOG_LEVEL=compact: demos skip their bulky "arguments" payloads (summary events only)
+LOG_COMPACT = os.environ.get("ISL_LOG_LEVEL", "").strip().lower() == "compact"
+
+def open_event_log(path, buffered: bool = False):
+    """
+    Open a JSONL event log for log_event (utf-8 text).
+    Line-buffered by default; buffered=True uses a 64 KiB block buffer so events
+    reach the OS in batches (flushed on close or by log_event(..., flush=True)).
+    """
+    return Path(path).open("w", buffering=(1 << 16) if buffered else 1, encoding="utf-8")
+
+# Record envelope is a fixed template: only ts and data are encoded per call;
+# the encoded kind strings are cached (there are a handful of distinct kinds).
+_EVENT_FMT = '{"ts":%r,"kind":%s,"data":%s}\n'
+_kind_json: dict[str, str] = {}
+
+def log_event(fp, kind: str, data: dict, flush: bool = False):
+    """Append one JSONL event. Pass flush=True for records that must hit the OS immediately."""
+    global _since_flush
+    k = _kind_json.get(kind)
+    if k is None:
+        k = _kind_json[kind] = json.dumps(kind)
+    fp.write(_EVENT_FMT % (time.time(), k, _dumps(data)))
+    if flush:
+        fp.flush()
+        _since_flush = 0
+    elif _FLUSH_EVERY > 0:
+        _since_flush += 1
+        if _since_flush >= _FLUSH_EVERY:
+            fp.flush()
+            _since_flush = 0
+
+def export_csv(path, rows, header, plain: bool = False):
+    """
+    plain=True: the caller guarantees no field needs quoting (no commas, quotes or newlines),
+    so rows are joined directly instead of going through csv.writer. Same bytes out.
+    """
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", newline="", encoding="utf-8") as fp:
+    with path.open("w", newline="", encoding="utf-8", buffering=1 << 20) as fp:
+        if plain:
+            fp.write(",".join(header) + "\r\n")
+            fp.writelines(",".join(map(str, r)) + "\r\n" for r in rows)
+            return
         w = csv.writer(fp)
         w.writerow(header)
-        for r in rows:
-            w.writerow(r)
+        w.writerows(rows)
 
 
 # --- span + metrics helpers ---
@@ -30,4 +108,4 @@ def log_metrics(fp, **kv):
     Convenience: standardize per-run metrics. Examples:
     log_metrics(fp, status="PASS", steps_to_success=3, af_iters=2, time_to_fix_s=1.27)
     """
-    log_event(fp, "metrics", kv)
+    log_event(fp, "metrics", kv, flush=True)
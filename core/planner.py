@@ -1,6 +1,8 @@
+import heapq
+from collections import defaultdict
 from dataclasses import dataclass
-from typing import Dict, Iterable, List
-from .arguments import Argument
+from typing import Dict, Iterable, List, Optional, Set
+from .arguments import Argument, ArgFramework
 
 @dataclass
 class PlanStep:
@@ -9,6 +11,83 @@ class PlanStep:
     deadline_ms: int
 
 def order_plan(args: Dict[str, Argument], ids: Iterable[str]) -> List[PlanStep]:
-    steps = [PlanStep(i, args[i].priority, args[i].deadline_ms) for i in ids if i in args]
-    steps.sort(key=lambda s: (s.deadline_ms, -s.priority, s.arg_id))
-    return steps
+    # sort plain (deadline, -priority, id) tuples: no per-item key callback
+    keyed = [(a.deadline_ms, -a.priority, i) for i in ids if (a := args.get(i)) is not None]
+    keyed.sort()
+    return [PlanStep(i, -p, d) for d, p, i in keyed]
+
+def order_plan_af(af: ArgFramework, ids: Iterable[str]) -> List[PlanStep]:
+    """
+    Same result as order_plan(af.args, ids), but the full sorted order is computed
+    once per framework (until af.mark_dirty()) and each call only filters it.
+    """
+    memo = af.__dict__.get("_plan_order")
+    if memo is None or memo[0] != af._af_version:
+        keyed = sorted((a.deadline_ms, -a.priority, i) for i, a in af.args.items())
+        memo = af.__dict__["_plan_order"] = (af._af_version, keyed)
+    keep = ids if isinstance(ids, (set, frozenset)) else frozenset(ids)
+    return [PlanStep(i, -p, d) for d, p, i in memo[1] if i in keep]
+
+class ReadyQueue:
+    """
+    Precondition-aware queue over plan steps: pop() returns the earliest (in plan
+    order) step whose args[step.arg_id].pre facts all hold. Blocked steps are indexed
+    by the facts they still miss, so satisfy(new_facts) only touches their waiters.
+    Missing facts are kept as an int bitmask per step (bit = fact index).
+
+    Ready steps form a heap on plan position, deliberately not a FIFO of release order:
+    a step released by satisfy() runs before later-planned steps that were ready all
+    along (e.g. A_verify_ide_hello right after A_run_ide_hello, ahead of A_run_web_search),
+    as the old rotate-and-retry loops ran it. They differ only for steps that loop had
+    already rotated to the back, which now keep their plan position.
+    """
+    def __init__(self, steps: Iterable[PlanStep], args: Dict[str, Argument], facts: Set[str]):
+        self.facts = facts
+        self._ready: List[tuple] = []  # heap of (plan position, step)
+        self._bit: Dict[str, int] = {}  # unmet fact -> its bit
+        self._unmet: Dict[str, int] = {}
+        self._waiters: Dict[str, List[tuple]] = defaultdict(list)
+        bit = self._bit
+        for pos, s in enumerate(steps):
+            entry = (pos, s)
+            mask = 0
+            for p in args[s.arg_id].pre:
+                if p not in facts:
+                    b = bit.get(p)
+                    if b is None:
+                        b = bit[p] = 1 << len(bit)
+                    if not mask & b:
+                        self._waiters[p].append(entry)
+                    mask |= b
+            if mask:
+                self._unmet[s.arg_id] = mask
+            else:
+                self._ready.append(entry)  # already in position order: a valid heap
+
+    def pop(self) -> Optional[PlanStep]:
+        """Next runnable step, or None when nothing is runnable."""
+        return heapq.heappop(self._ready)[1] if self._ready else None
+
+    def satisfy(self, new_facts: Iterable[str]):
+        """Add facts and release the steps whose last missing precondition they were."""
+        for f in new_facts:
+            if f in self.facts:
+                continue
+            self.facts.add(f)
+            waiters = self._waiters.pop(f, ())
+            if not waiters:
+                continue
+            clear = ~self._bit[f]
+            for entry in waiters:
+                aid = entry[1].arg_id
+                mask = self._unmet[aid] & clear
+                if mask:
+                    self._unmet[aid] = mask
+                else:
+                    del self._unmet[aid]
+                    heapq.heappush(self._ready, entry)
+
+    @property
+    def blocked(self) -> List[str]:
+        """Arg ids whose preconditions are still unmet."""
+        return list(self._unmet)
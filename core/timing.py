@@ -7,17 +7,28 @@ import time, csv, contextlib
 def now_ms() -> float:
     return time.perf_counter() * 1000.0
 
+def now_ns() -> int:
+    return time.perf_counter_ns()
+
 @dataclass
 class TimingEvent:
     iter: int
     phase: str
     step_id: str
     label: str
-    t_ms: float
-    dt_ms: float
+    t_ns: int
+    dt_ns: int
     deadline_ms: float | None
     status: str  # "PASS" | "SOFTMISS" | "HARDMISS" | ""
 
+    @property
+    def t_ms(self) -> float:
+        return self.t_ns / 1_000_000
+
+    @property
+    def dt_ms(self) -> float:
+        return self.dt_ns / 1_000_000
+
 class TimingSession:
     """
     Minimal timing logger: append rows and write a CSV at the end or anytime.
@@ -25,7 +36,7 @@ class TimingSession:
     def __init__(self, csv_path: Path, start_ms: float | None = None):
         self.csv_path = Path(csv_path)
         self.csv_path.parent.mkdir(parents=True, exist_ok=True)
-        self.t0 = now_ms() if start_ms is None else start_ms
+        self.t0_ns = now_ns() if start_ms is None else int(start_ms * 1_000_000)
         self.rows: list[TimingEvent] = []
         self.iter_idx = 0
 
@@ -43,18 +54,20 @@ class TimingSession:
             status = SOFTMISS if dt > deadline_ms but dt <= hard_ratio*deadline_ms
             status = HARDMISS if dt > hard_ratio*deadline_ms
         """
-        t1 = now_ms()
+        t1 = time.perf_counter_ns()
         try:
             yield
         finally:
-            t2 = now_ms()
+            t2 = time.perf_counter_ns()
             dt = t2 - t1
             status = ""
             if deadline_ms is not None:
-                hard = (hard_ratio or 1.0) * deadline_ms
-                if dt <= deadline_ms:
+                # integer compare in ns; ms only at write time
+                deadline_ns = int(deadline_ms * 1_000_000)
+                hard_ns = int((hard_ratio or 1.0) * deadline_ns)
+                if dt <= deadline_ns:
                     status = "PASS"
-                elif dt <= hard:
+                elif dt <= hard_ns:
                     status = "SOFTMISS"
                 else:
                     status = "HARDMISS"
@@ -63,20 +76,22 @@ class TimingSession:
                 phase=phase,
                 step_id=step_id,
                 label=label,
-                t_ms=(t2 - self.t0),
-                dt_ms=dt,
+                t_ns=(t2 - self.t0_ns),
+                dt_ns=dt,
                 deadline_ms=(deadline_ms if deadline_ms is not None else -1.0),
                 status=status,
             )
             self.rows.append(ev)
 
     def write_csv(self):
-        with self.csv_path.open("w", newline="", encoding="utf-8") as fp:
+        rows = [(r.iter, r.phase, r.step_id, r.label,
+                 f"{r.t_ns / 1_000_000:.3f}", f"{r.dt_ns / 1_000_000:.3f}",
+                 f"{r.deadline_ms:.3f}" if r.deadline_ms is not None else "", r.status)
+                for r in self.rows]
+        with self.csv_path.open("w", newline="", encoding="utf-8", buffering=1 << 20) as fp:
             w = csv.writer(fp)
             w.writerow(["iter", "phase", "step_id", "label", "t_ms", "dt_ms", "deadline_ms", "status"])
-            for r in self.rows:
-                w.writerow([r.iter, r.phase, r.step_id, r.label, f"{r.t_ms:.3f}", f"{r.dt_ms:.3f}",
-                            f"{r.deadline_ms:.3f}" if r.deadline_ms is not None else "", r.status])
+            w.writerows(rows)
 
 # Optional plotting helper (matplotlib). Safe to import if available.
 def plot_timing(csv_path: Path, out_png: Path):
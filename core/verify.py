@@ -1,37 +1,67 @@
-import os, subprocess, hashlib, json, re, time
+import os, subprocess, hashlib, json, locale, re, time
+from functools import lru_cache
 from pathlib import Path
 
+def _n_ticks(timeout_s: float, dt: float) -> int:
+    """Number of dt steps covering [0, timeout_s]; integer ticks avoid float drift from t += dt."""
+    return int(timeout_s / dt + 1e-9) + 1
+
 def file_exists(path: str, timeout_s: float, step_fn=None, dt: float = 0.1):
-    t = 0.0
-    while t <= timeout_s:
-        if os.path.exists(path):
-            return {"check":"file_exists","status":"PASS","elapsed_s":t,"path":path}
+    n = _n_ticks(timeout_s, dt)
+    exists = os.path.exists
+    for i in range(n):
+        if exists(path):
+            return {"check":"file_exists","status":"PASS","elapsed_s":i * dt,"path":path}
         if step_fn: step_fn(dt)
-        t += dt
-    return {"check":"file_exists","status":"FAIL","elapsed_s":t,"path":path}
+    return {"check":"file_exists","status":"FAIL","elapsed_s":n * dt,"path":path}
 
-def file_hash_equal(path: str, expected_sha256: str, timeout_s: float, step_fn=None, dt: float = 0.1):
-    def sha256_file(p):
+@lru_cache(maxsize=256)
+def _sha256_file(path: str, mtime_ns: int, size: int) -> str:
+    # keyed on the stat signature too: an unchanged file is hashed once, however often it is re-verified
+    with open(path, "rb") as f:
+        if hasattr(hashlib, "file_digest"):  # Python 3.11+
+            return hashlib.file_digest(f, "sha256").hexdigest()
         h = hashlib.sha256()
-        with open(p, "rb") as f:
-            for chunk in iter(lambda: f.read(65536), b""):
-                h.update(chunk)
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
         return h.hexdigest()
-    t = 0.0
-    while t <= timeout_s:
-        if os.path.exists(path):
-            digest = sha256_file(path)
+
+def file_hash_equal(path: str, expected_sha256: str, timeout_s: float, step_fn=None, dt: float = 0.1):
+    n = _n_ticks(timeout_s, dt)
+    for i in range(n):
+        try:
+            st = os.stat(path)
+        except OSError:
+            st = None
+        if st is not None:
+            digest = _sha256_file(path, st.st_mtime_ns, st.st_size)
             if digest == expected_sha256:
-                return {"check":"file_hash_equal","status":"PASS","elapsed_s":t,"hash":digest,"path":path}
+                return {"check":"file_hash_equal","status":"PASS","elapsed_s":i * dt,"hash":digest,"path":path}
         if step_fn: step_fn(dt)
-        t += dt
-    return {"check":"file_hash_equal","status":"FAIL","elapsed_s":t,"path":path}
+    return {"check":"file_hash_equal","status":"FAIL","elapsed_s":n * dt,"path":path}
+
+def run_captured(cmd: list, cwd: str = None, timeout_s: float = 120.0):
+    """
+    subprocess.run(cmd, capture_output=True) (bytes), or the exception it raised. Lets several
+    process verifiers judge one run of the same command through their res= argument.
+    """
+    try:
+        return subprocess.run(cmd, cwd=cwd, capture_output=True, timeout=timeout_s)
+    except Exception as e:
+        return e
 
-def proc_exitcode_ok(cmd: list, cwd: str = None, timeout_s: float = 120.0):
+def proc_exitcode_ok(cmd: list, cwd: str = None, timeout_s: float = 120.0, res=None):
+    """res: a run_captured(cmd, cwd) result to judge instead of running cmd here."""
     try:
-        res = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True, timeout=timeout_s)
+        if res is None:
+            res = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True, timeout=timeout_s)
+        elif isinstance(res, BaseException):
+            raise res
+        out, err = res.stdout, res.stderr
+        if isinstance(out, bytes):
+            out, err = _as_text(out), _as_text(err)
         return {"check":"proc_exitcode_ok","status":"PASS" if res.returncode==0 else "FAIL",
-                "returncode": res.returncode, "stdout": res.stdout, "stderr": res.stderr,
+                "returncode": res.returncode, "stdout": out, "stderr": err,
                 "cmd": cmd, "cwd": cwd}
     except subprocess.TimeoutExpired:
         return {"check":"proc_exitcode_ok","status":"FAIL","error":"timeout","cmd":cmd,"cwd":cwd}
@@ -44,62 +74,106 @@ def in_band(get_metric, target: float, tol: float, timeout_s: float, step_fn, dt
       - |metric - target| <= tol  -> PASS
       - elapsed time > timeout_s  -> FAIL
     Records metric history and elapsed time.
+    If step_fn returns a value it is taken as the new metric reading;
+    get_metric() is only called when step_fn returns None.
     """
-    t = 0.0
+    n = _n_ticks(timeout_s, dt)
+    lo, hi = target - tol, target + tol
     history = []
-    while t <= timeout_s:
-        val = float(get_metric())
-        history.append(val)
-        if abs(val - target) <= tol:
-            return {"check": "in_band", "status": "PASS", "history": history, "elapsed_s": t}
-        step_fn(dt)
-        t += dt
-    return {"check": "in_band", "status": "FAIL", "history": history, "elapsed_s": t}
+    push = history.append
+    val = get_metric()
+    for i in range(n):
+        val = float(val)
+        push(val)
+        if lo <= val <= hi:
+            return {"check": "in_band", "status": "PASS", "history": history, "elapsed_s": i * dt}
+        val = step_fn(dt)
+        if val is None:
+            val = get_metric()
+    return {"check": "in_band", "status": "FAIL", "history": history, "elapsed_s": n * dt}
 
 
+def in_band_series(values, target: float, tol: float, timeout_s: float, dt: float):
+    """
+    in_band over a precomputed/lazily generated metric series (one value per dt tick),
+    e.g. an open-loop plant trajectory: no per-tick get_metric/step_fn calls.
+    The series is advanced as often as in_band calls step_fn (i times for a PASS at
+    tick i, n times for a FAIL), so a generator-driven plant (PlantSim.open_loop)
+    ends in the same state.
+    """
+    n = _n_ticks(timeout_s, dt)
+    lo, hi = target - tol, target + tol
+    history = []
+    push = history.append
+    it = iter(values)
+    for i, val in zip(range(n), it):
+        push(val)
+        if lo <= val <= hi:
+            return {"check": "in_band", "status": "PASS", "history": history, "elapsed_s": i * dt}
+    next(it, None)  # the step in_band takes after its last failed sample
+    return {"check": "in_band", "status": "FAIL", "history": history, "elapsed_s": n * dt}
+
 def reach_threshold(get_metric, target: float, direction: str, timeout_s: float, step_fn, dt: float):
     """
     Like in_band, but checks one-sided threshold crossing:
       - direction == "down": metric <= target
       - direction == "up":   metric >= target
+    step_fn may return the new metric reading, as in in_band.
     """
-    t = 0.0
+    n = _n_ticks(timeout_s, dt)
     history = []
-    while t <= timeout_s:
-        val = float(get_metric())
-        history.append(val)
-        ok = (direction == "down" and val <= target) or (direction == "up" and val >= target)
-        if ok:
-            return {"check": "reach_threshold", "status": "PASS", "history": history, "elapsed_s": t}
-        step_fn(dt)
-        t += dt
-    return {"check": "reach_threshold", "status": "FAIL", "history": history, "elapsed_s": t}
+    push = history.append
+    down, up = direction == "down", direction == "up"
+    val = get_metric()
+    for i in range(n):
+        val = float(val)
+        push(val)
+        if (down and val <= target) or (up and val >= target):
+            return {"check": "reach_threshold", "status": "PASS", "history": history, "elapsed_s": i * dt}
+        val = step_fn(dt)
+        if val is None:
+            val = get_metric()
+    return {"check": "reach_threshold", "status": "FAIL", "history": history, "elapsed_s": n * dt}
 
 # --- Rich, deterministic verifiers ---
 
-def stdout_contains(cmd: list, cwd: str = ".", must_include: str = "", timeout_s: float = 30.0):
-    """Run a process and check that stdout contains a required substring."""
+def _as_text(data) -> str:
+    """Captured output as subprocess.run(..., text=True) returns it: locale encoding, universal newlines."""
+    if not isinstance(data, bytes):
+        return data or ""
+    return data.decode(locale.getpreferredencoding(False)).replace("\r\n", "\n").replace("\r", "\n")
+
+def stdout_contains(cmd: list, cwd: str = ".", must_include: str = "", timeout_s: float = 30.0, res=None):
+    """Run a process (or judge a run_captured result, res) and check that stdout contains a required substring."""
     try:
-        res = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True, timeout=timeout_s)
-        ok = (res.returncode == 0) and (must_include in (res.stdout or ""))
+        if res is None:
+            res = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True, timeout=timeout_s)
+        elif isinstance(res, BaseException):
+            raise res
+        out = _as_text(res.stdout)
+        ok = (res.returncode == 0) and (must_include in out)
         return {
             "check": "stdout_contains",
             "status": "PASS" if ok else "FAIL",
-            "returncode": res.returncode, "stdout": res.stdout, "stderr": res.stderr,
+            "returncode": res.returncode, "stdout": out, "stderr": _as_text(res.stderr),
             "must_include": must_include,
         }
     except Exception as e:
         return {"check": "stdout_contains", "status": "FAIL", "error": str(e)}
 
-def stdout_regex(cmd: list, cwd: str = ".", pattern: str = "", timeout_s: float = 30.0):
-    """Run a process and check stdout against a regex pattern."""
+def stdout_regex(cmd: list, cwd: str = ".", pattern: str = "", timeout_s: float = 30.0, res=None):
+    """Run a process (or judge a run_captured result, res) and check stdout against a regex pattern."""
     try:
-        res = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True, timeout=timeout_s)
-        ok = (res.returncode == 0) and re.search(pattern, res.stdout or "") is not None
+        if res is None:
+            res = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True, timeout=timeout_s)
+        elif isinstance(res, BaseException):
+            raise res
+        out = _as_text(res.stdout)
+        ok = (res.returncode == 0) and re.search(pattern, out) is not None
         return {
             "check": "stdout_regex",
             "status": "PASS" if ok else "FAIL",
-            "returncode": res.returncode, "stdout": res.stdout, "stderr": res.stderr,
+            "returncode": res.returncode, "stdout": out, "stderr": _as_text(res.stderr),
             "pattern": pattern,
         }
     except Exception as e:
@@ -1,13 +1,14 @@
 from pathlib import Path
 from core.af_solver import grounded_extension
 from core.planner import order_plan
-from core.verify import in_band, reach_threshold
-from core.logging_utils import log_event
+from core.verify import in_band, in_band_series, reach_threshold
+from core.logging_utils import log_event, open_event_log, LOG_COMPACT
 from domains.plant.model import ThermalPlant, PressurePlant
 from domains.plant.sensors import PlantSensors, PressureSensors
 from domains.plant.actuators import PlantActuators, PressureActuators
 from domains.plant.rules import generate_overtemp_AF
 from domains.plant.rules_overpressure import generate_overpressure_AF
+from domains.plant.controllers import p_policy_cool, p_policy_pressure
 from core.console import enable_utf8_stdout, emit_ok, emit_fail, emit_info
 enable_utf8_stdout()
 
@@ -27,16 +28,17 @@ def run_overtemp(P_POLICY=True):
     TIMEOUT = 60.0   # was 40.0
     DT = 0.02        # was 0.1 — finer step so we hit the band
 
-    with log_path.open("w") as fp:
+    with open_event_log(log_path, buffered=True) as fp:
         temp = sensors.read_temp()
         log_event(fp, "sense", {"temp": temp})
         af = generate_overtemp_AF(temp, T_HIGH=T_HIGH, target=TARGET, tol=TOL, timeout_s=TIMEOUT)
-        log_event(fp, "arguments", {"ids": list(af.args.keys()), "attacks": list(map(list, af.attacks))})
+        if not LOG_COMPACT:
+            log_event(fp, "arguments", {"ids": list(af.args.keys()), "attacks": list(af.attacks)})
 
         ext = grounded_extension(af)
-        log_event(fp, "grounded_extension", {"accepted": sorted(list(ext))})
+        log_event(fp, "grounded_extension", {"accepted": sorted(ext)})
         if not ext:
-            print("No admissible actions for overtemp.")
+            emit_info("No admissible actions for overtemp.")
             return False, str(log_path)
 
         steps = order_plan(af.args, ext)
@@ -53,36 +55,35 @@ def run_overtemp(P_POLICY=True):
 
         # P-like policy to smoothly reach band (with hysteresis)
         if P_POLICY:
-            u_prev = 0.0
+            read, open_valve, plant_step = sensors.read_temp, acts.open_valve, plant.step
+            u_prev, temp = 0.0, read()
             def step_with_p(dt):
-                nonlocal u_prev
-                err = sensors.read_temp() - TARGET
-                if err > TOL:
-                    # stronger cooling when above band, base + proportional
-                    u = min(1.0, 0.10 + 0.03 * err)
-                elif err < -TOL:
-                    # below band → stop cooling to avoid overshoot-down
-                    u = 0.0
-                else:
-                    # inside band → gently decay valve to hold position
-                    u = max(0.0, u_prev * 0.8)
-                acts.open_valve("V_cool", u)
+                # returns the post-step reading: in_band uses it, and so does the next tick's policy
+                nonlocal u_prev, temp
+                u = p_policy_cool(temp, TARGET, TOL, u_prev)
+                open_valve("V_cool", u)
                 u_prev = u
-                plant.step(dt)
+                plant_step(dt)
+                temp = read()
+                return temp
             step_fn = step_with_p
         else:
-            step_fn = plant.step
+            step_fn = None
 
 
         # Use in_band verifier for composite
-        res = in_band(
-            get_metric=sensors.read_temp,
-            target=float(TARGET),
-            tol=float(TOL),
-            timeout_s=float(TIMEOUT),
-            step_fn=step_fn,
-            dt=DT,
-        )
+        if step_fn is None:
+            # open-loop plant: evaluate its trajectory directly
+            res = in_band_series(plant.open_loop(DT), float(TARGET), float(TOL), float(TIMEOUT), DT)
+        else:
+            res = in_band(
+                get_metric=sensors.read_temp,
+                target=float(TARGET),
+                tol=float(TOL),
+                timeout_s=float(TIMEOUT),
+                step_fn=step_fn,
+                dt=DT,
+            )
         log_event(fp, "verify", res)
 
         if res.get("status") == "PASS":
@@ -106,17 +107,17 @@ def run_overpressure(P_POLICY=True):
     TIMEOUT = 90.0  # was 60.0
     DT = 0.02       # keep fine step
 
-    from domains.plant.rules_overpressure import generate_overpressure_AF
-    with log_path.open("w") as fp:
+    with open_event_log(log_path, buffered=True) as fp:
         p = sensors.read_pressure()
         log_event(fp, "sense", {"pressure": p})
         af = generate_overpressure_AF(p, P_HIGH=P_HIGH, target=TARGET, timeout_s=TIMEOUT)
-        log_event(fp, "arguments", {"ids": list(af.args.keys()), "attacks": list(map(list, af.attacks))})
+        if not LOG_COMPACT:
+            log_event(fp, "arguments", {"ids": list(af.args.keys()), "attacks": list(af.attacks)})
 
         ext = grounded_extension(af)
-        log_event(fp, "grounded_extension", {"accepted": sorted(list(ext))})
+        log_event(fp, "grounded_extension", {"accepted": sorted(ext)})
         if not ext:
-            print("No admissible actions for overpressure.")
+            emit_info("No admissible actions for overpressure.")
             return False, str(log_path)
 
         steps = order_plan(af.args, ext)
@@ -134,53 +135,37 @@ def run_overpressure(P_POLICY=True):
         # P-like policy for pressure to settle within band
         # P-like policy for pressure (two-phase with hysteresis)
         if P_POLICY:
-            relief_prev, inflow_prev = 0.0, 0.5
-            PHASE_SWITCH = 0.20   # when err > 0.20, use coarse (bang-bang-ish) phase
-            DECAY = 0.85          # hold/decay factor inside band to avoid jitter
+            read, open_relief, set_inflow = sensors.read_pressure, acts.open_relief, acts.set_inflow
+            plant_step = plant.step
+            relief_prev, inflow_prev, p = 0.0, 0.5, read()
 
             def step_with_p(dt):
-                nonlocal relief_prev, inflow_prev
-                p = sensors.read_pressure()
-                err = p - TARGET
-
-                if err > TOL:
-                    if err > PHASE_SWITCH:
-                        # Phase A (coarse): get down quickly
-                        relief = 1.0
-                        inflow = 0.0
-                    else:
-                        # Phase B (fine): proportional toward band
-                        # stronger proportional relief; reduce inflow near 0
-                        relief = min(1.0, 0.10 + 2.0 * err)   # try 2.0–3.0 if needed
-                        inflow = max(0.0, 0.10 - 0.50 * err)  # clamp to floor at 0
-                elif err < -TOL:
-                    # below band → stop venting; restore nominal inflow gently
-                    relief = 0.0
-                    inflow = 0.50
-                else:
-                    # inside band → gently decay toward last values to hold position
-                    relief = max(0.0, relief_prev * DECAY)
-                    # drift inflow toward a mild mid value to avoid slow drift
-                    target_inflow = 0.40
-                    inflow = max(0.0, min(1.0, DECAY * inflow_prev + (1.0 - DECAY) * target_inflow))
-
-                acts.open_relief(relief)
-                acts.set_inflow(inflow)
+                # returns the post-step reading: in_band uses it, and so does the next tick's policy
+                nonlocal relief_prev, inflow_prev, p
+                relief, inflow = p_policy_pressure(p, TARGET, TOL, relief_prev, inflow_prev)
+                open_relief(relief)
+                set_inflow(inflow)
                 relief_prev, inflow_prev = relief, inflow
-                plant.step(dt)
+                plant_step(dt)
+                p = read()
+                return p
 
             step_fn = step_with_p
         else:
-            step_fn = plant.step
-
-        res = in_band(
-            get_metric=sensors.read_pressure,
-            target=float(TARGET),
-            tol=float(TOL),
-            timeout_s=float(TIMEOUT),
-            step_fn=step_fn,
-            dt=DT,
-        )
+            step_fn = None
+
+        if step_fn is None:
+            # open-loop plant: evaluate its trajectory directly
+            res = in_band_series(plant.open_loop(DT), float(TARGET), float(TOL), float(TIMEOUT), DT)
+        else:
+            res = in_band(
+                get_metric=sensors.read_pressure,
+                target=float(TARGET),
+                tol=float(TOL),
+                timeout_s=float(TIMEOUT),
+                step_fn=step_fn,
+                dt=DT,
+            )
         log_event(fp, "verify", res)
 
         if res.get("status") == "PASS":
@@ -198,13 +183,13 @@ def main():
     INIT_OVER_TEMP = True
     INIT_OVER_PRESSURE = False
 
-    if INIT_OVER_TEMP:
-        ok, log_path = run_overtemp(P_POLICY=True)
-        return
-    if INIT_OVER_PRESSURE:
-        ok, log_path = run_overpressure(P_POLICY=True)
+    # both set -> handle both alarms (each run has its own plant and log file)
+    runs = [run for flag, run in ((INIT_OVER_TEMP, run_overtemp), (INIT_OVER_PRESSURE, run_overpressure)) if flag]
+    if not runs:
+        emit_info("No alarm initial condition set. Set INIT_OVER_TEMP or INIT_OVER_PRESSURE.")
         return
-    print("No alarm initial condition set. Set INIT_OVER_TEMP or INIT_OVER_PRESSURE.")
+    for run in runs:
+        ok, log_path = run(P_POLICY=True)
 
 if __name__ == "__main__":
     main()
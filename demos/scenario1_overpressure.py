@@ -2,7 +2,7 @@ from pathlib import Path
 from core.af_solver import grounded_extension
 from core.planner import order_plan
 from core.verify import in_band, reach_threshold
-from core.logging_utils import log_event, span, log_metrics
+from core.logging_utils import log_event, open_event_log, LOG_COMPACT, span, log_metrics
 from domains.plant.model import make_plant, Sensors, Actuators
 # from domains.plant.sensors import PressureSensors
 # from domains.plant.actuators import PressureActuators
@@ -29,7 +29,7 @@ def main():
     TIMEOUT = 30.0
     DT = 0.1
 
-    with LOG_PATH.open("w") as fp:
+    with open_event_log(LOG_PATH, buffered=True) as fp:
         ablation = get_ablation()
         log_event(fp, "config", {"ablation": ablation})
         emit_info(f"Ablation mode: {ablation}")
@@ -48,17 +48,18 @@ def main():
             if is_no_priority():
                 attacks_eff = attacks_raw  # no filter
             # (record the attacks used)
-            log_event(fp, "arguments", {
-                "ids": list(af.args.keys()),
-                "attacks": list(map(list, attacks_eff)),
-            })
+            if not LOG_COMPACT:
+                log_event(fp, "arguments", {
+                    "ids": list(af.args.keys()),
+                    "attacks": attacks_eff,  # list of (a, b) tuples; JSON encodes them as arrays
+                })
 
             if is_no_af():
                 ext = set(af.args.keys())  # bypass solver: admit all
             else:
                 ext = grounded_extension(af)  # your normal call
 
-            log_event(fp, "grounded_extension", {"accepted": sorted(list(ext))})
+            log_event(fp, "grounded_extension", {"accepted": sorted(ext)})
             if not ext:
                 emit_info("No admissible actions; nothing to do.")
                 log_metrics(fp, status="FAIL", steps_to_success=0, af_iters=1)
@@ -68,12 +69,6 @@ def main():
             log_event(fp, "plan", {"steps": [s.arg_id for s in steps]})
 
 
-        ext = grounded_extension(af)
-        log_event(fp, "grounded_extension", {"accepted": sorted(list(ext))})
-        if not ext:
-            print("No admissible actions; nothing to do.")
-            return
-
         steps_executed = 0
         first_fail_t = None
         af_iters = 1  # this scenario typically has 1 iteration
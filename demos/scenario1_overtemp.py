@@ -1,8 +1,8 @@
 from pathlib import Path
 from core.af_solver import grounded_extension
-from core.planner import order_plan
-from core.verify import in_band
-from core.logging_utils import log_event, span, log_metrics
+from core.planner import order_plan_af
+from core.verify import in_band_series
+from core.logging_utils import log_event, open_event_log, LOG_COMPACT, span, log_metrics
 from domains.plant.model import make_plant, Sensors, Actuators
 # from domains.plant.sensors import PlantSensors
 # from domains.plant.actuators import PlantActuators
@@ -30,7 +30,7 @@ def main():
     TIMEOUT = 30.0
     DT = 0.1  # simulation step (s)
 
-    with LOG_PATH.open("w") as fp:
+    with open_event_log(LOG_PATH, buffered=True) as fp:
         ablation = get_ablation()
         log_event(fp, "config", {"ablation": ablation})
         emit_info(f"Ablation mode: {ablation}")
@@ -49,37 +49,27 @@ def main():
             if is_no_priority():
                 attacks_eff = attacks_raw  # no filter
             # (record the attacks used)
-            log_event(fp, "arguments", {
-                "ids": list(af.args.keys()),
-                "attacks": list(map(list, attacks_eff)),
-            })
+            if not LOG_COMPACT:
+                log_event(fp, "arguments", {
+                    "ids": list(af.args.keys()),
+                    "attacks": attacks_eff,  # list of (a, b) tuples; JSON encodes them as arrays
+                })
 
             if is_no_af():
                 ext = set(af.args.keys())  # bypass solver: admit all
             else:
                 ext = grounded_extension(af)  # your normal call
 
-            log_event(fp, "grounded_extension", {"accepted": sorted(list(ext))})
+            log_event(fp, "grounded_extension", {"accepted": sorted(ext)})
             if not ext:
                 emit_info("No admissible actions; nothing to do.")
                 log_metrics(fp, status="FAIL", steps_to_success=0, af_iters=1)
                 return
 
-            steps = order_plan(af.args, ext)
+            steps = order_plan_af(af, ext)
             log_event(fp, "plan", {"steps": [s.arg_id for s in steps]})
 
 
-        # Solve grounded
-        ext = grounded_extension(af)
-        log_event(fp, "grounded_extension", {"accepted": sorted(list(ext))})
-        if not ext:
-            print("No admissible actions; nothing to do.")
-            return
-
-        # Order plan
-        steps = order_plan(af.args, ext)
-        log_event(fp, "plan", {"steps": [s.arg_id for s in steps]})
-
         steps_executed = 0
         first_fail_t = None
         af_iters = 1  # this scenario typically has 1 iteration
@@ -98,7 +88,8 @@ def main():
                 steps_executed += 1
 
             with span(fp, "verify", {"arg": a.id}):
-                res = in_band(get_metric=sens.read_temp, target=TARGET, tol=TOL, timeout_s=TIMEOUT, step_fn=plant.step, dt=DT)
+                # open-loop plant: evaluate its trajectory directly instead of in_band's per-tick callbacks
+                res = in_band_series(plant.open_loop(DT), target=TARGET, tol=TOL, timeout_s=TIMEOUT, dt=DT)
             log_event(fp, "verify", res)
 
             if res.get("status") == "PASS":
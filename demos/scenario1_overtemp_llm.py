@@ -1,10 +1,12 @@
+from functools import lru_cache
 from pathlib import Path
-from core.logging_utils import log_event
+from core.logging_utils import log_event, open_event_log, LOG_COMPACT
 from core.af_solver import grounded_extension
 from core.arguments import ArgFramework
 from core.planner import order_plan
 from core.verify import in_band
 from domains.plant.model import PlantSim, Sensors, Actuators
+from domains.plant.controllers import p_policy_cool
 from llm.adapter import LLMAdapter
 from llm.providers.mock import MockProvider
 from core.console import enable_utf8_stdout, emit_ok, emit_fail, emit_info
@@ -16,34 +18,40 @@ LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
 
 TARGET = 60.0; TOL = 0.5; DT = 0.02; TIMEOUT = 60.0
 
+@lru_cache(maxsize=1)
+def _adapter() -> LLMAdapter:
+    return LLMAdapter(MockProvider())
+
+@lru_cache(maxsize=32)
+def _gen_af(ctx_items: tuple) -> ArgFramework:
+    # same ctx -> same arguments: repeated runs reuse the AF (and its solver/plan caches)
+    llm_args, attacks = _adapter().generate_arguments(dict(ctx_items))
+    return ArgFramework(args={a.id: a for a in llm_args}, attacks=set(map(tuple, attacks)))
+
 def main(P_POLICY=True):
     plant = PlantSim(); sensors = Sensors(plant); acts = Actuators(plant)
     ctx = {"temp0": sensors.read_temp(), "target": TARGET, "tol": TOL, "timeout_s": TIMEOUT}
 
-    adapter = LLMAdapter(MockProvider())
-    llm_args = adapter.generate_arguments(ctx)
-    args = {a.id: a for a in llm_args}; attacks = set()
-    af = ArgFramework(args=args, attacks=attacks)
+    af = _gen_af(tuple(sorted(ctx.items())))
+    args = af.args
 
-    with LOG_PATH.open("w") as fp:
+    with open_event_log(LOG_PATH, buffered=True) as fp:
         log_event(fp, "sense", {"temp0": ctx["temp0"]})
-        log_event(fp, "arguments_llm", {"ids": list(args.keys())})
+        if not LOG_COMPACT:
+            log_event(fp, "arguments_llm", {"ids": list(args.keys())})
         ext = grounded_extension(af)
-        log_event(fp, "grounded_extension", {"accepted": sorted(list(ext))})
+        log_event(fp, "grounded_extension", {"accepted": sorted(ext)})
         steps = order_plan(af.args, af.args.keys())
         log_event(fp, "plan", {"steps": [s.arg_id for s in steps]})
 
-        u_prev = 0.0
+        read, open_valve, plant_step = sensors.read_temp, acts.open_valve, plant.step
+        u_prev, temp = 0.0, read()
         def step_with_p(dt):
-            nonlocal u_prev
-            err = sensors.read_temp() - TARGET
-            if err > TOL:
-                u = min(1.0, 0.10 + 0.03 * err)
-            elif err < -TOL:
-                u = 0.0
-            else:
-                u = max(0.0, u_prev * 0.8)
-            acts.open_valve("V_cool", u); u_prev = u; plant.step(dt)
+            # returns the post-step reading so in_band doesn't read the sensor again
+            nonlocal u_prev, temp
+            u = p_policy_cool(temp, TARGET, TOL, u_prev)
+            open_valve("V_cool", u); u_prev = u; plant_step(dt)
+            temp = read(); return temp
 
         for s in steps:
             a = af.args[s.arg_id]
@@ -1,63 +1,60 @@
+from functools import lru_cache
 from pathlib import Path
-import json
 from core.af_solver import grounded_extension
-from core.planner import order_plan
-from core.logging_utils import log_event
+from core.planner import order_plan, ReadyQueue
+from core.logging_utils import log_event, open_event_log, LOG_COMPACT, read_json
 from core.verify import file_exists
 from domains.desktop.agentos_actuators import AgentOSActuators
+from domains.desktop.sensors import DesktopSensors
 from domains.desktop.rules_agentos import generate_agentos_AF
 
 LOG_PATH = Path("runs/isl_nano_run_desktop_agentos.jsonl")
 LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
 
+# parsed once per process; treat the returned dict as read-only
+@lru_cache(maxsize=1)
 def load_cfg():
-    return json.loads(Path("configs/agentos.json").read_text())
+    return read_json("configs/agentos.json")
 
 def main(goals=("ide_hello","web_search")):
     cfg = load_cfg()
     acts = AgentOSActuators(cfg["project_root"], cfg.get("python_exe"))
     artifacts = cfg["artifacts"]
 
-    with LOG_PATH.open("w") as fp:
+    with open_event_log(LOG_PATH, buffered=True) as fp:
         log_event(fp, "sense", {"agentos_root": cfg["project_root"], "goals": list(goals)})
         af = generate_agentos_AF(list(goals), artifacts)
-        log_event(fp, "arguments", {"ids": list(af.args.keys()), "attacks": list(map(list, af.attacks))})
+        if not LOG_COMPACT:
+            log_event(fp, "arguments", {"ids": list(af.args.keys()), "attacks": list(af.attacks)})
         ext = grounded_extension(af)
-        log_event(fp, "grounded_extension", {"accepted": sorted(list(ext))})
+        log_event(fp, "grounded_extension", {"accepted": sorted(ext)})
         steps = order_plan(af.args, af.args.keys())
         log_event(fp, "plan", {"steps": [s.arg_id for s in steps]})
 
         # precondition facts (from filesystem for reruns)
         facts = set()
-        if Path(cfg["project_root"], artifacts["hello_stdout"]).exists():
+        present = DesktopSensors(cfg["project_root"]).existing((artifacts["hello_stdout"], artifacts["search_png"]))
+        if artifacts["hello_stdout"] in present:
             facts.add("fs:hello_stdout exists")
-        if Path(cfg["project_root"], artifacts["search_png"]).exists():
+        if artifacts["search_png"] in present:
             facts.add("fs:search_png exists")
 
-        def pre_ok(pre): return all(p in facts for p in pre)
-        def update_facts(a):
-            if a.id == "A_run_ide_hello": facts.add("fs:hello_stdout exists")
-            if a.id == "A_run_web_search": facts.add("fs:search_png exists")
+        def new_facts(a):
+            if a.id == "A_run_ide_hello": yield "fs:hello_stdout exists"
+            if a.id == "A_run_web_search": yield "fs:search_png exists"
 
-        queue = list(steps)
-        max_iters = len(queue)*4
-        iters = 0
-        while queue and iters < max_iters:
-            iters += 1
-            step = queue.pop(0)
+        # steps run in plan order once their preconditions hold; facts only grow, so this terminates
+        queue = ReadyQueue(steps, af.args, facts)
+        while (step := queue.pop()) is not None:
             a = af.args[step.arg_id]
 
-            if not pre_ok(a.pre):
-                queue.append(step)
-                continue
-
             if a.action.name == "run_goal":
                 res = acts.run_goal(a.action.params["goal"])
                 log_event(fp, "actuate", {"arg": a.id, "action": a.action.name, "params": a.action.params, "proc": res})
                 if res["returncode"] != 0:
                     log_event(fp, "verify", {"check":"proc_exitcode_ok","status":"FAIL","returncode":res["returncode"]})
                     print("❌ AgentOS goal failed"); return
-                update_facts(a)
+                queue.satisfy(new_facts(a))
             elif a.verify.name == "file_exists":
                 v = a.verify.params
                 path = str(Path(cfg["project_root"], v["path"]))
@@ -70,7 +67,7 @@ def main(goals=("ide_hello","web_search")):
             else:
                 raise ValueError(f"Unknown action: {a.action.name}")
 
-        if queue:
+        if queue.blocked:
             print("❌ Could not schedule all steps — unmet preconditions remain."); return
         print("✅ Desktop (AgentOS) tasks complete. Log:", LOG_PATH)
 
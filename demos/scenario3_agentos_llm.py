@@ -1,11 +1,13 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-import json
 from core.af_solver import grounded_extension
-from core.planner import order_plan
+from core.planner import order_plan, ReadyQueue
 from core.arguments import ArgFramework
-from core.logging_utils import log_event
+from core.logging_utils import log_event, open_event_log, LOG_COMPACT, read_json
 from core.verify import file_exists, proc_exitcode_ok
 from domains.desktop.agentos_actuators import AgentOSActuators
+from domains.desktop.sensors import DesktopSensors
 from llm.adapter import LLMAdapter
 from llm.providers.lmstudio import LMStudioProvider
 from llm.providers.mock_desktop import MockDesktopProvider
@@ -13,14 +15,17 @@ from llm.providers.mock_desktop import MockDesktopProvider
 LOG_PATH = Path("runs/isl_nano_run_desktop_agentos_llm.jsonl")
 LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
 
+# configs are parsed once per process; treat the returned dicts as read-only
+@lru_cache(maxsize=1)
 def load_cfg():
-    return json.loads(Path("configs/agentos.json").read_text())
+    return read_json("configs/agentos.json")
 
+@lru_cache(maxsize=1)
 def load_llm_cfg():
     p = Path("configs/llm.json")
     if not p.exists():
         return {"provider":"lmstudio","model":"qwen/qwen3-4b-2507","base_url":"http://127.0.0.1:1234/v1","api_key":"lm-studio"}
-    return json.loads(p.read_text())
+    return read_json(p)
 
 def make_provider(llm_cfg):
     prov = llm_cfg.get("provider", "lmstudio")
@@ -39,38 +44,40 @@ def main(goals=("ide_hello","web_search")):
     ctx = {"goals": goals, "artifacts": artifacts}
 
     adapter = LLMAdapter(provider)
-    llm_args = adapter.generate_arguments(ctx)
+    # the provider call is network-bound: probe the artifacts while it runs
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        fut = ex.submit(adapter.generate_arguments, ctx)
+        present = DesktopSensors(cfg["project_root"]).existing((artifacts["hello_stdout"], artifacts["search_png"]))
+        llm_args, _ = fut.result()
     args = {a.id: a for a in llm_args}
     # Prefer run before verify
     attacks = set([("L_verify_ide_hello","L_run_ide_hello"), ("L_verify_web_search","L_run_web_search")])
     af = ArgFramework(args=args, attacks=attacks)
 
-    with LOG_PATH.open("w") as fp:
+    with open_event_log(LOG_PATH, buffered=True) as fp:
         log_event(fp, "sense", {"agentos_root": cfg["project_root"], "goals": list(goals)})
         log_event(fp, "llm_cfg", {k: llm_cfg[k] for k in ("provider","model") if k in llm_cfg})
-        log_event(fp, "arguments_llm", {"ids": list(args.keys())})
+        if not LOG_COMPACT:
+            log_event(fp, "arguments_llm", {"ids": list(args.keys())})
         ext = grounded_extension(af)
-        log_event(fp, "grounded_extension", {"accepted": sorted(list(ext))})
+        log_event(fp, "grounded_extension", {"accepted": sorted(ext)})
         steps = order_plan(af.args, af.args.keys())
         log_event(fp, "plan", {"steps": [s.arg_id for s in steps]})
 
         facts = set()
-        if Path(cfg["project_root"], artifacts["hello_stdout"]).exists():
+        if artifacts["hello_stdout"] in present:
             facts.add("fs:hello_stdout exists")
-        if Path(cfg["project_root"], artifacts["search_png"]).exists():
+        if artifacts["search_png"] in present:
             facts.add("fs:search_png exists")
 
-        def pre_ok(pre): return all(p in facts for p in pre)
-        def update_facts(aid):
-            if aid.endswith("ide_hello"): facts.add("fs:hello_stdout exists")
-            if aid.endswith("web_search"): facts.add("fs:search_png exists")
+        def new_facts(aid):
+            if aid.endswith("ide_hello"): yield "fs:hello_stdout exists"
+            if aid.endswith("web_search"): yield "fs:search_png exists"
 
-        queue = list(steps); max_iters = len(queue)*4; iters=0
-        while queue and iters < max_iters:
-            iters += 1
-            step = queue.pop(0); a = af.args[step.arg_id]
-            if not pre_ok(a.pre):
-                queue.append(step); continue
+        # steps run in plan order once their preconditions hold; facts only grow, so this terminates
+        queue = ReadyQueue(steps, af.args, facts)
+        while (step := queue.pop()) is not None:
+            a = af.args[step.arg_id]
 
             if a.action.name == "run_goal":
                 goal = a.action.params["goal"]
@@ -79,7 +86,7 @@ def main(goals=("ide_hello","web_search")):
                 if res["returncode"] != 0:
                     log_event(fp, "verify", {"check":"proc_exitcode_ok","status":"FAIL","returncode":res["returncode"],"stderr":res.get("stderr","")})
                     print("❌ AgentOS goal failed:", goal); return
-                update_facts(a.id)
+                queue.satisfy(new_facts(a.id))
 
             elif a.action.name == "noop" and a.verify.name == "file_exists":
                 v = a.verify.params
@@ -97,7 +104,7 @@ def main(goals=("ide_hello","web_search")):
                     log_event(fp, "actuate", {"arg": a.id, "action": a.action.name})
                     log_event(fp, "verify", {"check": a.verify.name, "status": "SKIPPED"})
 
-        if queue:
+        if queue.blocked:
             print("❌ Could not schedule all steps — unmet preconditions remain."); return
         print("✅ Desktop (AgentOS) via LM Studio proposed steps complete. Log:", LOG_PATH)
 
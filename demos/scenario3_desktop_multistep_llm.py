@@ -1,18 +1,22 @@
 from pathlib import Path
-import json, time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from operator import attrgetter
+import itertools, json, subprocess, time
 from core.arguments import ArgFramework,ActionSpec, VerifySpec, Argument
-from core.af_solver import grounded_extension,filter_attacks_by_priority
-from core.planner import order_plan
-from core.logging_utils import log_event, export_csv
+from core.af_solver import grounded_extension, grounded_extension_incremental, filter_attacks_by_priority
+from core.planner import order_plan, ReadyQueue
+from core.logging_utils import log_event, open_event_log, LOG_COMPACT, export_csv
 from core.logging_utils import span, log_metrics
 from core.verify import (
-    file_exists, file_hash_equal, proc_exitcode_ok,
+    file_exists, file_hash_equal, proc_exitcode_ok, run_captured,
     stdout_contains, stdout_regex, json_field_equals, dir_contains, file_glob_exists
 )
 from core.ablation import is_no_af, is_no_diag, is_no_priority, get_ablation
 from domains.desktop.local_actuators import LocalDesktopActuators
 from llm.adapter import LLMAdapter
 from llm.provider_factory import make_provider
+from llm import _arg_cache, _plan_cache
 from core.console import enable_utf8_stdout, emit_ok, emit_fail, emit_info
 enable_utf8_stdout()
 
@@ -23,6 +27,58 @@ LOG_PATH = Path(os.environ.get("ISL_LOG_PATH", "runs/isl_nano_run_desktop_multis
 LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
 
 
+def _llm_config_sig():
+    """(path, mtime_ns) of the LLM config make_provider() reads; mtime None when it is absent."""
+    p = os.environ.get("ISL_LLM_CONFIG", "configs/llm.json")
+    try:
+        return p, os.stat(p).st_mtime_ns
+    except OSError:
+        return p, None
+
+@lru_cache(maxsize=4)
+def _provider_and_adapter(cfg_sig):
+    # one provider (and its HTTP client) per config version, reused across main() calls
+    provider = make_provider()
+    return provider, LLMAdapter(provider)
+
+def _cached_generate(provider, adapter, context, fp):
+    """
+    adapter.generate_arguments(context), served from llm._arg_cache (exact intent,
+    ISL_LLM_CACHE=1) or llm._plan_cache (intent pattern, ISL_PLAN_CACHE=1) when enabled.
+    """
+    intent = context["user_intent"]
+    key = None
+    if _arg_cache.ENABLED:
+        key = _arg_cache.intent_key(provider, intent)
+        cached = _arg_cache.get(key)
+        if cached is not None:
+            log_event(fp, "llm_cache", {"hit": True, "key": key})
+            return cached
+    if _plan_cache.ENABLED:
+        cached = _plan_cache.get(provider, intent)
+        if cached is not None:
+            log_event(fp, "llm_cache", {"hit": True, "template": _plan_cache.normalize(intent)[0]})
+            return cached
+    llm_args, attacks_raw = adapter.generate_arguments(context)
+    if key is not None:
+        _arg_cache.put(key, llm_args, attacks_raw)
+    if _plan_cache.ENABLED:
+        _plan_cache.put(provider, intent, llm_args, attacks_raw)
+    return llm_args, attacks_raw
+
+def _attack_pairs(raw) -> set:
+    """LLM attacks ([attacker, target, ...] sequences or {"from", "to"} dicts) -> {(attacker, target)}."""
+    pairs = set()
+    add = pairs.add
+    seq, dict_ = (list, tuple), dict
+    for e in raw:
+        if isinstance(e, seq):
+            if len(e) >= 2:
+                add((e[0], e[1]))
+        elif isinstance(e, dict_) and "from" in e and "to" in e:
+            add((e["from"], e["to"]))
+    return pairs
+
 def _make_diag_arg(failed_arg: Argument, reason: str) -> Argument:
     return Argument(
         id=f"D_{failed_arg.id}",
@@ -35,67 +91,194 @@ def _make_diag_arg(failed_arg: Argument, reason: str) -> Argument:
         priority=(getattr(failed_arg, "priority", 0) + 1)
     )
 
+def _on_verify_fail(a, af, ext, args, attack_edges, diag_edges, af_iters, fp):
+    """
+    Diagnosis after a failed verify: add D_<a.id> attacking a, re-solve and re-plan.
+    af/ext are the current framework and its extension; attack_edges the LLM's edges.
+    Adds to args and diag_edges in place; returns (af, ext, new plan steps, af_iters).
+    """
+    diag = _make_diag_arg(a, "verification_failed")
+    args[diag.id] = diag; diag_edges.add((diag.id, a.id))
+    with span(fp, "reason", {"iter": af_iters, "phase":"diagnosis"}):
+        if is_no_af():
+            # the pre-diagnosis framework ignored the LLM attacks: full solve over all of them
+            attacks = attack_edges | diag_edges
+            attacks_eff = attacks if is_no_priority() else filter_attacks_by_priority(args, attacks)
+            af = ArgFramework(args=args, attacks=attacks_eff)
+            ext = grounded_extension(af)
+        else:
+            # af.attacks already passed the filter under the same priorities: only the new edge needs it
+            added = {(diag.id, a.id)}
+            if not is_no_priority():
+                added = filter_attacks_by_priority(args, added)
+            af = af.extended(added)
+            attacks_eff = af.attacks
+            ext = grounded_extension_incremental(ext, af, added, added_args=(diag.id,))
+        log_event(fp, "diagnosis", {"diag": diag.id, "attacks_add": [(diag.id, a.id)]})
+        af_iters += 1
+    log_event(fp, "grounded_extension", {"accepted": sorted(ext)})
+    steps = order_plan(af.args, ext)
+    log_event(fp, "plan", {"steps": [s.arg_id for s in steps]})
+    if _EXPORT_EVERY_ITER:
+        _export_tables(args, ext, attacks_eff, suffix=f"_iter{af_iters-1:02d}")
+    return af, ext, steps, af_iters
+
+# Rough relative cost per check; verify_all runs the checks declared ahead of its first
+# process check cheapest-first, so a failure among them fails fast.
+_CHECK_COST = {"noop": 0, "file_exists": 1, "dir_contains": 1, "file_glob_exists": 1, "json_field_equals": 2,
+               "file_hash_equal": 3, "proc_exitcode_ok": 10, "stdout_contains": 10, "stdout_regex": 10}
+_PROC_CHECKS = frozenset({"proc_exitcode_ok", "stdout_contains", "stdout_regex"})
+# ISL_VERIFY_PARALLEL=1: a verify_all's process checks whose params say "independent": true
+# run concurrently; all others run sequentially and stop at the first FAIL
+_VERIFY_PARALLEL = os.environ.get("ISL_VERIFY_PARALLEL", "0").strip().lower() in ("1", "true", "yes", "on")
+
+def _check_name(one):
+    return one["name"] if isinstance(one, dict) else getattr(one, "name", "?")
+
+def _check_params(one):
+    return one.params if hasattr(one, "params") else one.get("params", {})
+
+def _cheap_first(verifiers):
+    """
+    verifiers with the run before the first process check stable-sorted by _CHECK_COST;
+    that check and everything after it keep their declared order, since a later check
+    may read what a process check writes (or a stray main.py its heal moves).
+    """
+    head = next((i for i, one in enumerate(verifiers) if _check_name(one) in _PROC_CHECKS), len(verifiers))
+    if head < 2:
+        return verifiers
+    return sorted(verifiers[:head], key=lambda one: _CHECK_COST.get(_check_name(one), 5)) + list(verifiers[head:])
+
 def _verify_all(acts_root, v, fp):
     verifiers = []
     if isinstance(v, dict) and "verify_all" in v:
         verifiers = v["verify_all"]
+        if len(verifiers) > 1:
+            verifiers = _cheap_first(verifiers)
     else:
         verifiers = [v]
+    # several process checks: run each distinct command once (see _run_proc_check)
+    runs = run_timeout = None
+    procs = [one for one in verifiers if _check_name(one) in _PROC_CHECKS]
+    if len(procs) > 1:
+        runs = {}
+        run_timeout = max(_proc_timeout(_check_name(one), _check_params(one)) for one in procs)
     all_ok = True
+    prefetch = _VERIFY_PARALLEL and runs is not None
     for one in verifiers:
-        with span(fp, "verify", {"check": (one["name"] if isinstance(one, dict) else getattr(one,"name","?"))}):
-            vr = _run_one_check(acts_root, one)
+        name = _check_name(one)
+        if prefetch and name in _PROC_CHECKS:
+            # cheap checks (sorted first) passed: start the independent commands together
+            _prefetch_runs(acts_root, procs, runs, run_timeout)
+            prefetch = False
+        with span(fp, "verify", {"check": name}):
+            if runs is not None and name in _PROC_CHECKS:
+                vr = _run_proc_check(name, acts_root, _check_params(one), runs, run_timeout)
+            else:
+                vr = _run_one_check_cached(acts_root, one)
         log_event(fp, "verify", vr)
         if vr.get("status") != "PASS":
             all_ok = False
             break
     return all_ok
 
+# af_selection columns taken from each Argument: priority, topic, action
+_ROW_GET = attrgetter("priority", "topic", "action.name")
+_RUNS_DIR = Path("runs")
+_RUNS_DIR.mkdir(parents=True, exist_ok=True)
+_AF_ITER = itertools.count()  # suffix source when the caller passes none
+# ISL_EXPORT_EVERY_ITER=0: skip the per-solve/per-diagnosis tables, write only the run's final ones
+_EXPORT_EVERY_ITER = os.environ.get("ISL_EXPORT_EVERY_ITER", "1").strip() != "0"
+# suffix -> signature (arg rows, accepted ids, attack edges) of the tables last written under
+# it in this main() call: values only, so no run's args/attacks are kept alive by the cache
+_last_export: dict = {}
+
 def _export_tables(args, ext, attacks_eff_current, suffix=""):
-    try:
-        from core.logging_utils import export_csv
-    except Exception:
-        import csv
-        def export_csv(path, rows, header):
-            path.parent.mkdir(parents=True, exist_ok=True)
-            with path.open("w", newline="", encoding="utf-8") as fp:
-                w = csv.writer(fp); w.writerow(header); [w.writerow(r) for r in rows]
-
-    outdir = Path("runs"); outdir.mkdir(parents=True, exist_ok=True)
+    outdir = _RUNS_DIR
     if not suffix:
-        iter_idx = globals().get("_af_iter", 0)
-        suffix = f"_iter{iter_idx:02d}"
-        globals()["_af_iter"] = iter_idx + 1
-
-    acc = set(ext or [])
-    rows = []
-    for aid, a in args.items():
-        rows.append([aid, "ACCEPTED" if aid in acc else "REJECTED", getattr(a,"priority",0),
-                     getattr(a,"topic",""), getattr(getattr(a,"action", None), "name","")])
+        suffix = f"_iter{next(_AF_ITER):02d}"
+
+    acc = ext if isinstance(ext, (set, frozenset)) else set(ext or ())
+    sig = (tuple((aid, *_ROW_GET(a)) for aid, a in args.items()), frozenset(acc),
+           tuple(attacks_eff_current or ()))
+    if _last_export.get(suffix) == sig:
+        return  # same tables already on disk under this suffix
+    _last_export[suffix] = sig
+    # rows are generated straight into writerows, no intermediate lists
+    rows = ((aid, "ACCEPTED" if aid in acc else "REJECTED", *_ROW_GET(a)) for aid, a in args.items())
     export_csv(outdir / f"af_selection{suffix}.csv", rows,
                header=["arg_id","status","priority","topic","action"])
 
-    rows2 = []
-    for edge in (attacks_eff_current or []):
-        try: x,y = edge
-        except Exception: continue
-        rows2.append([x,y])
-    export_csv(outdir / f"af_attacks{suffix}.csv", rows2, header=["attacker","target"])
+    # main() normalizes attacks to (attacker, target) pairs; LLM ids may still need quoting
+    export_csv(outdir / f"af_attacks{suffix}.csv", attacks_eff_current or (), header=["attacker","target"])
+
+# --- action handlers: act(a, acts, fp) -> None, or a failure message that ends the run ---
+
+def _act_create_dir(a, acts, fp):
+    with span(fp, "act", {"arg": a.id}):
+        res = acts.create_dir(a.action.params["path"])
+        log_event(fp, "actuate", {"arg": a.id, "action": "create_dir", "params": a.action.params, "res": res})
+
+def _act_write_file(a, acts, fp):
+    with span(fp, "act", {"arg": a.id}):
+        p = a.action.params["path"]; content = a.action.params.get("content","")
+        res = acts.write_file(p, content)
+        log_event(fp, "actuate", {"arg": a.id, "action": "write_file", "params": {"path": p}, "res": res})
+
+def _act_run_proc(a, acts, fp):
+    cmd = list(a.action.params["cmd"])
+    cwd = a.action.params.get("cwd", ".")
+    # Normalize path duplication
+    if cwd not in (".", "") and len(cmd) >= 2 and isinstance(cmd[1], str):
+        prefix = f"{cwd}/"
+        if cmd[1].startswith(prefix):
+            cmd[1] = cmd[1][len(prefix):]
+    target_dir = Path(acts.root, cwd).resolve()
+    target_dir.mkdir(parents=True, exist_ok=True)
+    if len(cmd) >= 2 and isinstance(cmd[1], str) and cmd[1].endswith("main.py"):
+        target_main = (target_dir / "main.py")
+        if not target_main.exists():
+            stray = _find_stray_main(acts.root)
+            if stray and stray.exists():
+                target_dir.mkdir(parents=True, exist_ok=True)
+                target_main.write_text(stray.read_text(encoding="utf-8"), encoding="utf-8")
+                try: stray.unlink()
+                except Exception: pass
+                _invalidate_fs_caches()
+    with span(fp, "act", {"arg": a.id}):
+        res = acts.run_proc(cmd, cwd=cwd, timeout_s=120.0)
+        _invalidate_fs_caches()  # the process may have written files
+        log_event(fp, "actuate", {"arg": a.id, "action": "run_proc", "params": {"cmd": cmd, "cwd": cwd}, "res": res})
+    if res["returncode"] != 0:
+        log_event(fp, "verify", {"check":"proc_exitcode_ok","status":"FAIL","returncode":res["returncode"]})
+        return "process failed"
+
+def _act_noop(a, acts, fp):
+    with span(fp, "act", {"arg": a.id}):
+        log_event(fp, "actuate", {"arg": a.id, "action": "noop"})
+
+# action name -> (handler, whether the step's effects are added after it)
+_ACTIONS = {
+    "create_dir": (_act_create_dir, True),
+    "write_file": (_act_write_file, True),
+    "run_proc": (_act_run_proc, True),
+    "noop": (_act_noop, False),
+}
 
 def main(user_intent="Create a new dir 'proj', write a Python hello app in proj/main.py that prints 'Hello ISL-NANO', run it, and verify stdout and that main.py exists."):
     acts = LocalDesktopActuators("workspace_desktop")
     # Use the configurable provider; resolves to lmstudio_multistep by default
     # based on configs/llm.json (provider/model/parameters).
-    provider = make_provider()
-    adapter = LLMAdapter(provider)
+    provider, adapter = _provider_and_adapter(_llm_config_sig())
 
     af_iters = 0
     steps_executed = 0
     first_fail_t = None
 
     context = {"user_intent": user_intent}
+    _last_export.clear()  # an earlier run's tables may have been overwritten or removed since
 
-    with LOG_PATH.open("w", encoding="utf-8") as fp:
+    with open_event_log(LOG_PATH, buffered=True) as fp:
         ablation = get_ablation()
         log_event(fp, "config", {"ablation": ablation})
         emit_info(f"Ablation mode: {ablation}")
@@ -105,20 +288,10 @@ def main(user_intent="Create a new dir 'proj', write a Python hello app in proj/
             log_event(fp, "sense", {"workspace": "workspace_desktop", "intent": user_intent})
 
         with span(fp, "reason", {"iter": af_iters, "phase":"nl_to_formal"}):
-            llm_args, attacks = adapter.generate_arguments(context)
-        # Normalize attacks
-        if attacks is None:
-            attacks = set()
-        elif isinstance(attacks, set):
-            pass
-        else:
-            _att_set = set()
-            for e in attacks:
-                if isinstance(e, (list, tuple)) and len(e) >= 2:
-                    _att_set.add((e[0], e[1]))
-                elif isinstance(e, dict) and "from" in e and "to" in e:
-                    _att_set.add((e["from"], e["to"]))
-            attacks = _att_set
+            llm_args, attacks_raw = _cached_generate(provider, adapter, context, fp)
+        # Normalize attacks (built once; never mutated, diagnoses collect their edges in diag_edges)
+        attack_edges = _attack_pairs(attacks_raw or ())
+        diag_edges = set()
 
         # (Optional) DEBUG failing verifier (keep commented in happy path)
         # for a in llm_args:
@@ -134,7 +307,6 @@ def main(user_intent="Create a new dir 'proj', write a Python hello app in proj/
         #         }
         #         break
 
-        attack_edges = set((a[0], a[1]) for a in attacks)
         args = {a.id: a for a in llm_args}
 
         with span(fp, "reason", {"iter": af_iters, "phase":"solve"}):
@@ -151,234 +323,231 @@ def main(user_intent="Create a new dir 'proj', write a Python hello app in proj/
                 ext = grounded_extension(af)
             af_iters += 1
 
-        log_event(fp, "arguments_llm", {"ids": list(args.keys())})
-        if attacks:
-            log_event(fp, "attacks_llm", {"edges": list(list(x) for x in attacks)})
+        if not LOG_COMPACT:
+            log_event(fp, "arguments_llm", {"ids": list(args.keys())})
+        if attack_edges:
+            log_event(fp, "attacks_llm", {"edges": list(map(list, attack_edges))})
 
-        log_event(fp, "grounded_extension", {"accepted": sorted(list(ext))})
+        log_event(fp, "grounded_extension", {"accepted": sorted(ext)})
         steps = order_plan(af.args, ext)
         log_event(fp, "plan", {"steps": [s.arg_id for s in steps]})
-        _export_tables(args, ext, attacks_eff_current, suffix=f"_iter{af_iters-1:02d}")
+        if _EXPORT_EVERY_ITER:
+            _export_tables(args, ext, attacks_eff_current, suffix=f"_iter{af_iters-1:02d}")
 
-        # Simple fact set from filesystem
+        # Simple fact set from filesystem; the queue hands out steps (in plan order) once their pre hold
         facts = set()
-        def pre_ok(pre): return all(p in facts for p in pre)
-        def add_effects(effects): 
-            for e in effects: facts.add(e)
-
-        queue = list(steps); iters = 0; max_iters = len(queue)*4
-        while queue and iters < max_iters:
-            iters += 1
-            step = queue.pop(0)
+        queue = ReadyQueue(steps, af.args, facts)
+        def fail(msg):
+            emit_fail(msg)
+            log_metrics(fp, status="FAIL", steps_to_success=steps_executed, af_iters=af_iters)
+
+        def add_effects(effects):
+            queue.satisfy(effects)
+            _invalidate_fs_caches()  # the action may have changed files the cached checks looked at
+
+        while (step := queue.pop()) is not None:
             a = af.args[step.arg_id]
-            if not pre_ok(a.pre):
-                queue.append(step); continue
-
-            if a.action.name == "create_dir":
-                with span(fp, "act", {"arg": a.id}):
-                    p = a.action.params["path"]
-                    res = acts.create_dir(p)
-                    log_event(fp, "actuate", {"arg": a.id, "action": "create_dir", "params": a.action.params, "res": res})
-                    steps_executed += 1
-                add_effects(a.effects)
-                if not _verify_all(acts.root, a.verify, fp):
-                    if is_no_diag():
-                        emit_fail("verify failed (no diagnosis)")
-                        log_metrics(fp, status="FAIL", steps_to_success=steps_executed, af_iters=af_iters)
-                        return
-                    if first_fail_t is None: first_fail_t = time.perf_counter()
-                    diag = _make_diag_arg(a, "verification_failed")
-                    args[diag.id] = diag; attacks.add((diag.id, a.id))
-                    with span(fp, "reason", {"iter": af_iters, "phase":"diagnosis"}):
-                        attacks_eff = attacks if is_no_priority() else filter_attacks_by_priority(args, attacks)
-                        af = ArgFramework(args=args, attacks=attacks_eff)
-                        log_event(fp, "diagnosis", {"diag": diag.id, "attacks_add": [(diag.id, a.id)]})
-                        ext = grounded_extension(af)
-                        af_iters += 1
-                    log_event(fp, "grounded_extension", {"accepted": sorted(list(ext))})
-                    steps = order_plan(af.args, ext)
-                    log_event(fp, "plan", {"steps": [s.arg_id for s in steps]})
-                    _export_tables(args, ext, attacks_eff, suffix=f"_iter{af_iters-1:02d}")
-                    queue = list(steps); continue
-
-            elif a.action.name == "write_file":
-                with span(fp, "act", {"arg": a.id}):
-                    p = a.action.params["path"]; content = a.action.params.get("content","")
-                    res = acts.write_file(p, content)
-                    log_event(fp, "actuate", {"arg": a.id, "action": "write_file", "params": {"path": p}, "res": res})
-                    steps_executed += 1
-                add_effects(a.effects)
-                if not _verify_all(acts.root, a.verify, fp):
-                    if is_no_diag():
-                        emit_fail("verify failed (no diagnosis)")
-                        log_metrics(fp, status="FAIL", steps_to_success=steps_executed, af_iters=af_iters)
-                        return
-                    if first_fail_t is None: first_fail_t = time.perf_counter()
-                    diag = _make_diag_arg(a, "verification_failed")
-                    args[diag.id] = diag; attacks.add((diag.id, a.id))
-                    with span(fp, "reason", {"iter": af_iters, "phase":"diagnosis"}):
-                        attacks_eff = attacks if is_no_priority() else filter_attacks_by_priority(args, attacks)
-                        af = ArgFramework(args=args, attacks=attacks_eff)
-                        log_event(fp, "diagnosis", {"diag": diag.id, "attacks_add": [(diag.id, a.id)]})
-                        ext = grounded_extension(af)
-                        af_iters += 1
-                    log_event(fp, "grounded_extension", {"accepted": sorted(list(ext))})
-                    steps = order_plan(af.args, ext)
-                    log_event(fp, "plan", {"steps": [s.arg_id for s in steps]})
-                    _export_tables(args, ext, attacks_eff, suffix=f"_iter{af_iters-1:02d}")
-                    queue = list(steps); continue
-
-            elif a.action.name == "run_proc":
-                cmd = list(a.action.params["cmd"])
-                cwd = a.action.params.get("cwd", ".")
-                # Normalize path duplication
-                if cwd not in (".", "") and len(cmd) >= 2 and isinstance(cmd[1], str):
-                    prefix = f"{cwd}/"
-                    if cmd[1].startswith(prefix):
-                        cmd[1] = cmd[1][len(prefix):]
-                from pathlib import Path as _P
-                target_dir = _P(acts.root, cwd).resolve()
-                target_dir.mkdir(parents=True, exist_ok=True)
-                if len(cmd) >= 2 and isinstance(cmd[1], str) and cmd[1].endswith("main.py"):
-                    target_main = (target_dir / "main.py")
-                    if not target_main.exists():
-                        stray = None
-                        for p in acts.root.rglob("main.py"):
-                            stray = p; break
-                        if stray and stray.exists():
-                            target_dir.mkdir(parents=True, exist_ok=True)
-                            target_main.write_text(stray.read_text(encoding="utf-8"), encoding="utf-8")
-                            try: stray.unlink()
-                            except Exception: pass
-                with span(fp, "act", {"arg": a.id}):
-                    res = acts.run_proc(cmd, cwd=cwd, timeout_s=120.0)
-                    log_event(fp, "actuate", {"arg": a.id, "action": "run_proc", "params": {"cmd": cmd, "cwd": cwd}, "res": res})
-                    steps_executed += 1
-                if res["returncode"] != 0:
-                    log_event(fp, "verify", {"check":"proc_exitcode_ok","status":"FAIL","returncode":res["returncode"]})
-                    _export_tables(args, ext, attacks_eff_current, suffix=f"_iter{af_iters-1:02d}")
-                    emit_fail("process failed")
-                    log_metrics(fp, status="FAIL", steps_to_success=steps_executed, af_iters=af_iters)
-                    return
-                add_effects(a.effects)
-                if not _verify_all(acts.root, a.verify, fp):
-                    if is_no_diag():
-                        emit_fail("verify failed (no diagnosis)")
-                        log_metrics(fp, status="FAIL", steps_to_success=steps_executed, af_iters=af_iters)
-                        return
-                    if first_fail_t is None: first_fail_t = time.perf_counter()
-                    diag = _make_diag_arg(a, "verification_failed")
-                    args[diag.id] = diag; attacks.add((diag.id, a.id))
-                    with span(fp, "reason", {"iter": af_iters, "phase":"diagnosis"}):
-                        attacks_eff = attacks if is_no_priority() else filter_attacks_by_priority(args, attacks)
-                        af = ArgFramework(args=args, attacks=attacks_eff)
-                        log_event(fp, "diagnosis", {"diag": diag.id, "attacks_add": [(diag.id, a.id)]})
-                        ext = grounded_extension(af)
-                        af_iters += 1
-                    log_event(fp, "grounded_extension", {"accepted": sorted(list(ext))})
-                    steps = order_plan(af.args, ext)
-                    log_event(fp, "plan", {"steps": [s.arg_id for s in steps]})
-                    _export_tables(args, ext, attacks_eff, suffix=f"_iter{af_iters-1:02d}")
-                    queue = list(steps); continue
-
-            elif a.action.name == "noop":
-                with span(fp, "act", {"arg": a.id}):
-                    log_event(fp, "actuate", {"arg": a.id, "action": "noop"})
-                    steps_executed += 1
-                if not _verify_all(acts.root, a.verify, fp):
-                    if is_no_diag():
-                        emit_fail("verify failed (no diagnosis)")
-                        log_metrics(fp, status="FAIL", steps_to_success=steps_executed, af_iters=af_iters)
-                        return
-                    if first_fail_t is None: first_fail_t = time.perf_counter()
-                    diag = _make_diag_arg(a, "verification_failed")
-                    args[diag.id] = diag; attacks.add((diag.id, a.id))
-                    with span(fp, "reason", {"iter": af_iters, "phase":"diagnosis"}):
-                        attacks_eff = attacks if is_no_priority() else filter_attacks_by_priority(args, attacks)
-                        af = ArgFramework(args=args, attacks=attacks_eff)
-                        log_event(fp, "diagnosis", {"diag": diag.id, "attacks_add": [(diag.id, a.id)]})
-                        ext = grounded_extension(af)
-                        af_iters += 1
-                    log_event(fp, "grounded_extension", {"accepted": sorted(list(ext))})
-                    steps = order_plan(af.args, ext)
-                    log_event(fp, "plan", {"steps": [s.arg_id for s in steps]})
-                    _export_tables(args, ext, attacks_eff, suffix=f"_iter{af_iters-1:02d}")
-                    queue = list(steps); continue
 
-            else:
+            entry = _ACTIONS.get(a.action.name)
+            if entry is None:
                 log_event(fp, "actuate", {"arg": a.id, "action": a.action.name, "status":"UNSUPPORTED"})
                 _export_tables(args, ext, attacks_eff_current, suffix=f"_iter{af_iters-1:02d}")
-                emit_fail(f"unsupported action:{a.action.name}")
-                log_metrics(fp, status="FAIL", steps_to_success=steps_executed, af_iters=af_iters)
-                return
-
-        if queue:
-            iter_idx = globals().get("_af_iter", 0)
-            _export_tables(args, ext, attacks_eff_current, suffix=f"_iter{iter_idx:02d}")
-            globals()["_af_iter"] = iter_idx + 1
-            emit_fail("unmet preconditions remain")
-            log_metrics(fp, status="FAIL", steps_to_success=steps_executed, af_iters=af_iters)
-            return
+                return fail(f"unsupported action:{a.action.name}")
+            act, has_effects = entry
+            err = act(a, acts, fp)
+            steps_executed += 1
+            if err:
+                _export_tables(args, ext, attacks_eff_current, suffix=f"_iter{af_iters-1:02d}")
+                return fail(err)
+            if has_effects:
+                add_effects(a.effects)
+
+            if not _verify_all(acts.root, a.verify, fp):
+                if is_no_diag():
+                    _export_tables(args, ext, attacks_eff_current, suffix=f"_iter{af_iters-1:02d}")
+                    return fail("verify failed (no diagnosis)")
+                if first_fail_t is None: first_fail_t = time.perf_counter()
+                af, ext, steps, af_iters = _on_verify_fail(a, af, ext, args, attack_edges, diag_edges, af_iters, fp)
+                attacks_eff_current = af.attacks  # now includes the D_ edges
+                queue = ReadyQueue(steps, af.args, facts)
+
+        if queue.blocked:
+            _export_tables(args, ext, attacks_eff_current)
+            return fail("unmet preconditions remain")
 
-        iter_idx = globals().get("_af_iter", 0)
-        _export_tables(args, ext, attacks_eff_current, suffix=f"_iter{iter_idx:02d}")
-        globals()["_af_iter"] = iter_idx + 1
+        _export_tables(args, ext, attacks_eff_current)
         emit_ok(f"Desktop multistep LLM plan executed and verified. Log: {LOG_PATH}")
         log_metrics(fp, status="PASS", steps_to_success=steps_executed, af_iters=af_iters,
                     time_to_fix_s=(0.0 if first_fail_t is None else (time.perf_counter()-first_fail_t)))
 
-def _run_one_check(acts_root, v):
+# Read-only, file-based checks -> the param naming the file/dir they inspect.
+# Their PASS is a function of params + that path's state, so it is cached on
+# (name, params, root, mtime/size of the path); process checks are never cached,
+# nor is dir_contains (a directory's own stat misses changes below it).
+_CACHEABLE_CHECKS = {"file_exists": "path", "file_hash_equal": "path", "json_field_equals": "path"}
+_CHECK_CACHE_MAX = 512
+_check_cache: dict = {}
+
+def _stat_sig(p):
+    try:
+        st = os.stat(p)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+def _run_one_check_cached(acts_root, v):
     name = v.name if hasattr(v, "name") else v["name"]
     params = v.params if hasattr(v, "params") else v.get("params", {})
+    field = _CACHEABLE_CHECKS.get(name)
+    if field is None or field not in params:
+        return _run_one_check(acts_root, v)
+    try:
+        key = (name, json.dumps(params, sort_keys=True), str(acts_root), _stat_sig(Path(acts_root, params[field])))
+    except TypeError:  # params not JSON-able: don't cache
+        return _run_one_check(acts_root, v)
+    hit = _check_cache.get(key)
+    if hit is None:
+        hit = _run_one_check(acts_root, v)
+        # only PASS is kept: a FAIL must re-poll for its timeout_s, the file may still appear
+        if hit.get("status") == "PASS":
+            if len(_check_cache) >= _CHECK_CACHE_MAX:
+                _check_cache.clear()
+            _check_cache[key] = hit
+    return hit
+
+# workspace root -> first main.py found under it (None: none). Filled by
+# _find_stray_main, cleared whenever an action or a heal may have moved files.
+_stray_main_index: dict = {}
+
+def _invalidate_fs_caches():
+    """Forget cached check results and stray lookups: called after anything that may touch files."""
+    _check_cache.clear()
+    _stray_main_index.clear()
+
+def _first_main_py(root: str):
+    """
+    First main.py under root in rglob's order (a directory's own entries, then its
+    subdirectories depth-first, symlinked dirs not followed); stops at the first hit
+    and works on DirEntry's cached type info instead of building a Path per entry.
+    """
+    stack = [root]
+    while stack:
+        d = stack.pop()
+        try:
+            it = os.scandir(d)
+        except OSError:
+            continue
+        subdirs = []
+        with it:
+            for e in it:
+                if e.name == "main.py" and e.is_file():
+                    return Path(e.path)
+                if e.is_dir(follow_symlinks=False):
+                    subdirs.append(e.path)
+        stack.extend(reversed(subdirs))
+    return None
+
+def _find_stray_main(root):
+    key = str(root)
+    if key not in _stray_main_index:
+        _stray_main_index[key] = _first_main_py(key)
+    return _stray_main_index[key]
+
+def _norm_cmd_and_heal(acts_root, cmd: list, cwd: str):
+    cmd2 = list(cmd)
+    if cwd not in (".", "", None) and len(cmd2) >= 2 and isinstance(cmd2[1], str):
+        prefix = f"{cwd}/"
+        if cmd2[1].startswith(prefix):
+            cmd2[1] = cmd2[1][len(prefix):]
+    cwd_dir = Path(acts_root, cwd or ".").resolve()
+    cwd_dir.mkdir(parents=True, exist_ok=True)
+    if len(cmd2) >= 2 and isinstance(cmd2[1], str) and cmd2[1].endswith("main.py"):
+        target_main = (cwd_dir / "main.py")
+        if not target_main.exists():
+            stray = _find_stray_main(acts_root)
+            if stray and stray.exists():
+                target_main.write_text(stray.read_text(encoding="utf-8"), encoding="utf-8")
+                try: stray.unlink()
+                except Exception: pass
+                _invalidate_fs_caches()
+    return cmd2, str(cwd_dir)
+
+# process checks: name -> judge(cmd, cwd, params, res) over the normalized/healed (cmd, cwd);
+# res=None runs the command, a run_captured() result is judged as is
+_PROC_JUDGES = {
+    "proc_exitcode_ok": lambda cmd, cwd, p, res: proc_exitcode_ok(cmd, cwd, res=res),
+    "stdout_contains": lambda cmd, cwd, p, res: stdout_contains(cmd, cwd, must_include=p["must_include"],
+                                                                timeout_s=p.get("timeout_s", 30.0), res=res),
+    "stdout_regex": lambda cmd, cwd, p, res: stdout_regex(cmd, cwd, pattern=p["pattern"],
+                                                          timeout_s=p.get("timeout_s", 30.0), res=res),
+}
+
+def _proc_timeout(name, p):
+    # proc_exitcode_ok is called without timeout_s here: its 120 s default applies
+    return 120.0 if name == "proc_exitcode_ok" else p.get("timeout_s", 30.0)
+
+def _timed_run(key, timeout_s):
+    t0 = time.perf_counter()
+    res = run_captured(list(key[0]), key[1], timeout_s)
+    return res, time.perf_counter() - t0
+
+def _prefetch_runs(acts_root, procs, runs, run_timeout):
+    """
+    Run the distinct (cmd, cwd) of one verify_all's process checks marked "independent": true
+    concurrently into runs; the rest still run one by one, in check order, when judged.
+    Heals happen here, in order, on the calling thread; the workers only wait on subprocesses.
+    """
+    keys = {}
+    for one in procs:
+        p = _check_params(one)
+        if not p.get("independent"):
+            continue  # may read what an earlier command writes, or must not run after a FAIL
+        cmd2, cwd2 = _norm_cmd_and_heal(acts_root, p["cmd"], p.get("cwd", "."))
+        keys[(tuple(cmd2), cwd2)] = None
+    if len(keys) < 2:
+        return  # nothing to overlap: _run_proc_check runs it when first judged
+    with ThreadPoolExecutor(max_workers=min(4, len(keys))) as ex:
+        runs.update(zip(keys, ex.map(_timed_run, keys, itertools.repeat(run_timeout))))
+    _invalidate_fs_caches()
+
+def _run_proc_check(name, acts_root, p, runs=None, run_timeout=None):
+    """
+    Process check `name`. With runs (a dict shared across one verify_all), checks on the same
+    (cmd, cwd) judge a single run_captured() of it; a check whose own timeout that run
+    exceeded still fails as a timeout.
+    """
+    cmd2, cwd2 = _norm_cmd_and_heal(acts_root, p["cmd"], p.get("cwd", "."))
+    res = None
+    if runs is not None:
+        key = (tuple(cmd2), cwd2)
+        if key not in runs:
+            runs[key] = _timed_run(key, run_timeout)
+        res, elapsed = runs[key]
+        own = _proc_timeout(name, p)
+        if elapsed > own and not isinstance(res, BaseException):
+            res = subprocess.TimeoutExpired(cmd2, own)
+    vr = _PROC_JUDGES[name](cmd2, cwd2, p, res)
+    _invalidate_fs_caches()  # verifier commands may write files too
+    return vr
+
+# verifier name -> handler(acts_root, params); built once, looked up per check
+_VERIFIERS = {
+    "noop": lambda root, p: {"check": "noop", "status": "PASS"},
+    "file_exists": lambda root, p: file_exists(str(Path(root, p["path"])), p.get("timeout_s", 5.0)),
+    "file_hash_equal": lambda root, p: file_hash_equal(str(Path(root, p["path"])), p["expected_sha256"], p.get("timeout_s", 5.0)),
+    "proc_exitcode_ok": lambda root, p: _run_proc_check("proc_exitcode_ok", root, p),
+    "stdout_contains": lambda root, p: _run_proc_check("stdout_contains", root, p),
+    "stdout_regex": lambda root, p: _run_proc_check("stdout_regex", root, p),
+    "json_field_equals": lambda root, p: json_field_equals(str(Path(root, p["path"])), p["pointer"], p["expected"]),
+    "dir_contains": lambda root, p: dir_contains(str(Path(root, p["path"])), p.get("min_files", 1)),
+    "file_glob_exists": lambda root, p: file_glob_exists(str(Path(root, p["root"])), p["pattern"]),
+}
 
-    def _norm_cmd_and_heal(cmd: list, cwd: str):
-        from pathlib import Path as _P
-        cmd2 = list(cmd)
-        if cwd not in (".", "", None) and len(cmd2) >= 2 and isinstance(cmd2[1], str):
-            prefix = f"{cwd}/"
-            if cmd2[1].startswith(prefix):
-                cmd2[1] = cmd2[1][len(prefix):]
-        cwd_dir = _P(acts_root, cwd or ".").resolve()
-        cwd_dir.mkdir(parents=True, exist_ok=True)
-        if len(cmd2) >= 2 and isinstance(cmd2[1], str) and cmd2[1].endswith("main.py"):
-            target_main = (cwd_dir / "main.py")
-            if not target_main.exists():
-                stray = None
-                for p in _P(acts_root).rglob("main.py"):
-                    stray = p; break
-                if stray and stray.exists():
-                    target_main.write_text(stray.read_text(encoding="utf-8"), encoding="utf-8")
-                    try: stray.unlink()
-                    except Exception: pass
-        return cmd2, str(cwd_dir)
-
-    if name == "noop":
-        return {"check": "noop", "status": "PASS"}
-    if name == "file_exists":
-        tgt = Path(acts_root, params["path"])
-        return file_exists(str(tgt), params.get("timeout_s", 5.0))
-    if name == "file_hash_equal":
-        tgt = Path(acts_root, params["path"])
-        return file_hash_equal(str(tgt), params["expected_sha256"], params.get("timeout_s", 5.0))
-    if name == "proc_exitcode_ok":
-        cmd2, cwd2 = _norm_cmd_and_heal(params["cmd"], params.get("cwd", "."))
-        return proc_exitcode_ok(cmd2, cwd=cwd2)
-    if name == "stdout_contains":
-        cmd2, cwd2 = _norm_cmd_and_heal(params["cmd"], params.get("cwd", "."))
-        return stdout_contains(cmd2, cwd=cwd2, must_include=params["must_include"], timeout_s=params.get("timeout_s",30.0))
-    if name == "stdout_regex":
-        cmd2, cwd2 = _norm_cmd_and_heal(params["cmd"], params.get("cwd", "."))
-        return stdout_regex(cmd2, cwd=cwd2, pattern=params["pattern"], timeout_s=params.get("timeout_s",30.0))
-    if name == "json_field_equals":
-        tgt = Path(acts_root, params["path"])
-        return json_field_equals(str(tgt), params["pointer"], params["expected"])
-    if name == "dir_contains":
-        tgt = Path(acts_root, params["path"])
-        return dir_contains(str(tgt), params.get("min_files", 1))
-    if name == "file_glob_exists":
-        root = Path(acts_root, params["root"])
-        return file_glob_exists(str(root), params["pattern"])
-    return {"check": name, "status": "SKIPPED"}
+def _run_one_check(acts_root, v):
+    name = v.name if hasattr(v, "name") else v["name"]
+    params = v.params if hasattr(v, "params") else v.get("params", {})
+    handler = _VERIFIERS.get(name)
+    return handler(acts_root, params) if handler else {"check": name, "status": "SKIPPED"}
 
 if __name__ == "__main__":
     main()
@@ -1,10 +1,10 @@
 from pathlib import Path
-import json, hashlib, sys
+import json, hashlib, subprocess, sys
 from core.af_solver import grounded_extension
-from core.planner import order_plan
-from core.logging_utils import log_event
+from core.planner import order_plan, ReadyQueue
+from core.logging_utils import log_event, open_event_log, LOG_COMPACT
 from core.verify import file_exists, file_hash_equal, proc_exitcode_ok
-from domains.desktop.actuators import DesktopActuators
+from domains.desktop.actuators import DesktopActuators, PY_WORKER_ENABLED
 from domains.desktop.sensors import DesktopSensors
 from domains.desktop.rules_scraper import generate_scraper_AF
 from core.console import enable_utf8_stdout, emit_ok, emit_fail, emit_info
@@ -13,6 +13,13 @@ enable_utf8_stdout()
 LOG_PATH = Path("runs/isl_nano_run_desktop_scraper.jsonl")
 LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
 WORKSPACE = "workspace_s3"
+# workspace file -> fact it establishes (seeds the facts on reruns)
+_FS_FACTS = {
+    "project/sample.html": "fs:sample.html exists",
+    "project/scraper.py": "fs:scraper.py exists",
+    "project/test_scraper.py": "fs:test exists",
+    "project/output.json": "out:output.json exists",
+}
 
 SCRAPER_PY = """import json, pathlib
 from bs4 import BeautifulSoup
@@ -35,74 +42,76 @@ def test_scraper_runs_and_outputs_expected():
 """
 def sha256_text(s: str) -> str:
     h = hashlib.sha256(); h.update(s.encode('utf-8')); return h.hexdigest()
+# default separators on purpose: must encode exactly as SCRAPER_PY's json.dumps(data, sort_keys=True)
+_ENC = json.JSONEncoder(sort_keys=True)
 def sha256_json(obj) -> str:
-    h = hashlib.sha256(); 
-    import json as _j; h.update(_j.dumps(obj, sort_keys=True).encode('utf-8')); return h.hexdigest()
+    h = hashlib.sha256(); h.update(_ENC.encode(obj).encode('utf-8')); return h.hexdigest()
+
+# expected digests of constant inputs: computed once at import
+_SCRAPER_SHA = sha256_text(SCRAPER_PY)
+_TEST_SHA = sha256_text(TEST_PY)
+_OUT_SHA = sha256_json({"title":"Demo Page","h1":"Hello ISL-NANO"})
+
+def _run_scraper(acts, a):
+    """The run_py step as a proc_exitcode_ok record; through the actuator's worker when ISL_PY_WORKER=1."""
+    if not PY_WORKER_ENABLED:
+        return proc_exitcode_ok([sys.executable, "scraper.py"], cwd=str(Path(WORKSPACE)/"project"))
+    script, args = a.action.params["script"], list(a.action.params.get("args") or ())
+    cmd, cwd = [sys.executable, script, *args], str(acts.workspace)
+    try:
+        r = acts.run_py(script, args, venv_python=sys.executable, timeout_s=120.0)
+    except subprocess.TimeoutExpired:
+        return {"check":"proc_exitcode_ok","status":"FAIL","error":"timeout","cmd":cmd,"cwd":cwd}
+    return {"check":"proc_exitcode_ok","status":"PASS" if r["returncode"]==0 else "FAIL",
+            "returncode": r["returncode"], "stdout": r["stdout"], "stderr": r["stderr"],
+            "cmd": cmd, "cwd": cwd}
 
 def main():
     acts = DesktopActuators(WORKSPACE)
     sens = DesktopSensors(WORKSPACE)
     expected = {
-        "scraper_sha": sha256_text(SCRAPER_PY),
-        "test_sha": sha256_text(TEST_PY),
-        "out_sha": sha256_json({"title":"Demo Page","h1":"Hello ISL-NANO"}),
+        "scraper_sha": _SCRAPER_SHA,
+        "test_sha": _TEST_SHA,
+        "out_sha": _OUT_SHA,
     }
-    with LOG_PATH.open("w") as fp:
+    with open_event_log(LOG_PATH, buffered=True) as fp:
         log_event(fp, "sense", {"workspace": WORKSPACE})
         af = generate_scraper_AF(state={}, expected=expected)
-        log_event(fp, "arguments", {"ids": list(af.args.keys()), "attacks": list(map(list, af.attacks))})
+        if not LOG_COMPACT:
+            log_event(fp, "arguments", {"ids": list(af.args.keys()), "attacks": list(af.attacks)})
         ext = grounded_extension(af)
-        log_event(fp, "grounded_extension", {"accepted": sorted(list(ext))})
+        log_event(fp, "grounded_extension", {"accepted": sorted(ext)})
         # Use all args so preconditions can pull in the necessary writes/tests deterministically
         steps = order_plan(af.args, af.args.keys())
         log_event(fp, "plan", {"steps": [s.arg_id for s in steps]})
 
-        # --- Helper: precondition check ---
-        def pre_ok(pre: tuple, facts: set) -> bool:
-            return all(p in facts for p in pre)
-        # --- Helper: after a successful verify, update facts based on action/effects ---
-        def update_facts_after_success(a, facts: set):
+        # --- Helper: after a successful verify, the facts it establishes ---
+        def new_facts(a):
             # Infer facts from action/effects/verifier names
             if a.action.name == "write_file":
                 kind = a.action.params.get("kind")
                 if kind == "html":
-                    facts.add("fs:sample.html exists")
+                    yield "fs:sample.html exists"
                 elif kind == "scraper":
-                    facts.add("fs:scraper.py exists")
+                    yield "fs:scraper.py exists"
                 elif kind == "tests":
-                    facts.add("fs:test exists")
+                    yield "fs:test exists"
             elif a.action.name == "run_pytest":
-                facts.add("tests:pass")
+                yield "tests:pass"
             elif a.action.name == "run_py":
-                facts.add("out:output.json exists")
+                yield "out:output.json exists"
             # You can also optionally union any symbolic a.effects here:
-            for e in a.effects:
-                facts.add(e)
+            yield from a.effects
 
         # --- Build initial facts from the real filesystem (in case of reruns) ---
-        facts = set()
-        if (Path(WORKSPACE)/"project/sample.html").exists():
-            facts.add("fs:sample.html exists")
-        if (Path(WORKSPACE)/"project/scraper.py").exists():
-            facts.add("fs:scraper.py exists")
-        if (Path(WORKSPACE)/"project/test_scraper.py").exists():
-            facts.add("fs:test exists")
-        if (Path(WORKSPACE)/"project/output.json").exists():
-            facts.add("out:output.json exists")
-
-        # --- Execute respecting preconditions via a simple queue ---
-        queue = list(steps)
-        max_iters = len(queue) * 4  # safety to avoid infinite loops
-        iters = 0
-        while queue and iters < max_iters:
-            iters += 1
-            step = queue.pop(0)
+        present = sens.existing(_FS_FACTS)
+        facts = {fact for path, fact in _FS_FACTS.items() if path in present}
+
+        # --- Execute respecting preconditions: steps run in plan order once their pre hold ---
+        queue = ReadyQueue(steps, af.args, facts)
+        while (step := queue.pop()) is not None:
             a = af.args[step.arg_id]
 
-            if not pre_ok(a.pre, facts):
-                # prerequisites not met yet → push to the back
-                queue.append(step)
-                continue
             # Execute this step now that preconditions are satisfied
             if a.action.name == "write_file":
                 kind = a.action.params.get("kind")
@@ -126,7 +135,7 @@ def main():
                 log_event(fp, "verify", res)
                 if res["status"] != "PASS":
                     emit_fail(f"Verification failed at. Log: {a.id}"); return
-                update_facts_after_success(a, facts)
+                queue.satisfy(new_facts(a))
 
             elif a.action.name == "run_pytest":
                 res = proc_exitcode_ok(a.verify.params["cmd"], cwd=str(Path(WORKSPACE)/a.verify.params["cwd"]), timeout_s=float(a.verify.params["timeout_s"]))
@@ -134,11 +143,10 @@ def main():
                 log_event(fp, "verify", res)
                 if res["status"] != "PASS":
                     emit_fail("Tests failed"); print(res.get("stdout",""), res.get("stderr","")); return
-                update_facts_after_success(a, facts)
+                queue.satisfy(new_facts(a))
 
             elif a.action.name == "run_py":
-                import sys
-                res_run = proc_exitcode_ok([sys.executable, "scraper.py"], cwd=str(Path(WORKSPACE)/"project"))
+                res_run = _run_scraper(acts, a)
                 log_event(fp, "actuate", {"arg": a.id, "action": a.action.name, "params": a.action.params, "proc": res_run})
                 if res_run["status"] != "PASS":
                     log_event(fp, "verify", res_run); emit_fail("run failed"); return
@@ -147,13 +155,13 @@ def main():
                 log_event(fp, "verify", res)
                 if res["status"] != "PASS":
                     emit_fail("Output verification failed"); return
-                update_facts_after_success(a, facts)
+                queue.satisfy(new_facts(a))
 
             else:
                 raise ValueError(f"Unknown action: {a.action.name}")
         
         # all done?
-        if queue:
+        if queue.blocked:
             emit_fail("Could not schedule all steps – unmet preconditions remain.")
             return
 
@@ -1,10 +1,19 @@
-import os, subprocess
+import os, json, queue, subprocess, threading
 from pathlib import Path
 
+# ISL_PY_WORKER=1: run_py goes through one long-lived py_worker.py per actuator instead of a
+# fresh interpreter per call (falls back to subprocess.run if the worker can't start or dies).
+# Scripts then share one interpreter: see py_worker.py for what is and isn't reset between runs.
+PY_WORKER_ENABLED = os.environ.get("ISL_PY_WORKER", "0").strip().lower() in ("1", "true", "yes", "on")
+_WORKER_PY = Path(__file__).with_name("py_worker.py")
+
 class DesktopActuators:
     def __init__(self, workspace: str):
         self.workspace = Path(workspace)
         self.workspace.mkdir(parents=True, exist_ok=True)
+        self._worker = None
+        self._worker_exe = None
+        self._replies = None
 
     def write_file(self, path: str, content: str):
         p = self.workspace / path
@@ -12,13 +21,78 @@ class DesktopActuators:
         p.write_text(content, encoding="utf-8")
         return str(p)
 
-    def run_py(self, script_path: str, args=None, venv_python: str = None):
+    def run_py(self, script_path: str, args=None, venv_python: str = None, timeout_s: float = None):
+        """Run a script in the workspace; with timeout_s, raises subprocess.TimeoutExpired after it."""
         args = args or []
         python_exe = venv_python or "python"
         cmd = [python_exe, script_path] + args
-        res = subprocess.run(cmd, cwd=self.workspace, capture_output=True, text=True)
+        if PY_WORKER_ENABLED:
+            out = self._worker_run(python_exe, cmd, timeout_s)
+            if out is not None:
+                return {**out, "cmd": cmd}
+        res = subprocess.run(cmd, cwd=self.workspace, capture_output=True, text=True, timeout=timeout_s)
         return {"returncode": res.returncode, "stdout": res.stdout, "stderr": res.stderr, "cmd": cmd}
 
+    def _start_worker(self, python_exe: str) -> bool:
+        self.close()
+        try:
+            w = subprocess.Popen([python_exe, "-u", str(_WORKER_PY)], stdin=subprocess.PIPE,
+                                 stdout=subprocess.PIPE, text=True, encoding="utf-8")
+        except OSError:
+            return False
+        # replies are read on a thread so a run can be abandoned after its timeout
+        replies = queue.Queue()
+        def pump():
+            for line in w.stdout:
+                replies.put(line)
+            replies.put("")  # EOF: the worker exited
+        threading.Thread(target=pump, daemon=True).start()
+        self._worker, self._worker_exe, self._replies = w, python_exe, replies
+        return True
+
+    def _worker_run(self, python_exe: str, cmd: list, timeout_s: float = None):
+        """
+        run_py through the persistent worker; None if it is unavailable or died (caller falls
+        back). On timeout the worker is killed (the next call starts a fresh one) and
+        subprocess.TimeoutExpired is raised, as subprocess.run would.
+        """
+        if self._worker is None or self._worker.poll() is not None or self._worker_exe != python_exe:
+            if not self._start_worker(python_exe):
+                return None
+        try:
+            self._worker.stdin.write(json.dumps({"script": cmd[1], "args": cmd[2:],
+                                                 "cwd": str(self.workspace)}) + "\n")
+            self._worker.stdin.flush()
+            line = self._replies.get(timeout=timeout_s)
+        except queue.Empty:
+            self.close(kill=True)
+            raise subprocess.TimeoutExpired(cmd, timeout_s)
+        except OSError:  # broken pipe: the worker died
+            line = ""
+        if not line:
+            self.close()
+            return None
+        try:
+            return json.loads(line)
+        except ValueError:
+            self.close()
+            return None
+
+    def close(self, kill: bool = False):
+        """Stop the run_py worker, if any (it also exits on its own when this process does)."""
+        w, self._worker, self._replies = self._worker, None, None
+        if w is None:
+            return
+        if not kill:
+            try:
+                w.stdin.close()
+                w.wait(timeout=5)
+                return
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+        w.kill()
+        w.wait()
+
     def create_sample_html(self, path: str):
         html = """<!doctype html><html><head><title>Demo Page</title></head>
         <body><h1 id='head'>Hello ISL-NANO</h1><p>deterministic content</p></body></html>"""
@@ -0,0 +1,89 @@
+# domains/desktop/py_worker.py
+"""
+Persistent Python worker behind DesktopActuators.run_py (ISL_PY_WORKER=1). Runs one script
+per request inside this interpreter, so repeated runs skip interpreter start-up and keep
+stdlib / site-packages imports (bs4, ...) loaded.
+
+Request:  {"script": path, "args": [...], "cwd": dir}   one JSON object per line
+Response: {"returncode": int, "stdout": str, "stderr": str}
+
+Requests and responses travel on private duplicates of fds 0/1; scripts (and anything
+they start) see an empty stdin, and their fd-1 output goes to the worker's stderr. Only
+output written through sys.stdout / sys.stderr is captured. Exits on request-channel EOF.
+
+Reset after every run: cwd, sys.argv, sys.path, os.environ, the root logger's handlers and
+level, and every module the run imported from outside stdlib/site-packages. Not reset:
+changes a script makes to modules that were already loaded (monkeypatches, module
+globals), which is why the worker is opt-in.
+"""
+import contextlib, io, json, logging, os, runpy, site, sys, sysconfig, traceback
+
+# modules loaded from here stay cached between runs; anything else a run imports is dropped
+_KEEP_ROOTS = tuple(os.path.join(os.path.abspath(p), "") for p in
+                    {*(sysconfig.get_paths()[k] for k in ("stdlib", "platstdlib", "purelib", "platlib")),
+                     *site.getsitepackages(), site.getusersitepackages()})
+
+def _exit_code(code) -> int:
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)  # sys.exit("msg"), as the interpreter does
+    return 1
+
+def _drop_new_modules(before: set):
+    for name in set(sys.modules) - before:
+        f = getattr(sys.modules[name], "__file__", None)
+        if f and not os.path.abspath(f).startswith(_KEEP_ROOTS):
+            del sys.modules[name]
+
+def _run(req: dict) -> dict:
+    script, cwd = req["script"], req.get("cwd") or "."
+    out, err = io.StringIO(), io.StringIO()
+    cwd0, argv0, path0, mods0 = os.getcwd(), sys.argv, list(sys.path), set(sys.modules)
+    env0 = dict(os.environ)
+    root = logging.getLogger()
+    handlers0, level0 = list(root.handlers), root.level
+    rc = 0
+    try:
+        os.chdir(cwd)
+        sys.argv = [script, *req.get("args", [])]
+        sys.path.insert(0, os.path.dirname(os.path.abspath(script)))
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            try:
+                runpy.run_path(script, run_name="__main__")
+            except SystemExit as e:
+                rc = _exit_code(e.code)
+            except Exception:
+                traceback.print_exc()
+                rc = 1
+    finally:
+        os.chdir(cwd0)
+        sys.argv, sys.path[:] = argv0, path0
+        os.environ.clear()
+        os.environ.update(env0)
+        root.handlers[:], root.level = handlers0, level0
+        _drop_new_modules(mods0)
+    return {"returncode": rc, "stdout": out.getvalue(), "stderr": err.getvalue()}
+
+def main():
+    # private request/response channels; fds 0/1 become /dev/null and stderr for the scripts
+    requests = os.fdopen(os.dup(0), "r", encoding="utf-8")
+    proto = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    os.close(devnull)
+    os.dup2(2, 1)
+    sys.stdin = open(os.devnull, encoding="utf-8")
+    for line in requests:
+        if not line.strip():
+            continue
+        try:
+            resp = _run(json.loads(line))
+        except Exception as e:  # malformed request, missing cwd, ...
+            resp = {"returncode": 1, "stdout": "", "stderr": f"py_worker: {e}"}
+        proto.write(json.dumps(resp) + "\n")
+        proto.flush()
+
+if __name__ == "__main__":
+    main()
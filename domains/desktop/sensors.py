@@ -8,10 +8,34 @@ class DesktopSensors:
     def file_exists(self, path: str) -> bool:
         return (self.workspace / path).exists()
 
+    def existing(self, paths) -> set:
+        """
+        Subset of paths that exist: one scandir per distinct parent dir instead of a stat per path.
+        Names are compared normcase'd; one the listing doesn't match is still stat'ed, so
+        case-insensitive filesystems (where normcase folds nothing, as on macOS) answer as
+        os.path.exists would.
+        """
+        by_dir = {}
+        for p in paths:
+            parent, _, name = str(p).replace("\\", "/").rpartition("/")
+            by_dir.setdefault(parent, []).append((p, os.path.normcase(name)))
+        found = set()
+        for parent, entries in by_dir.items():
+            try:
+                with os.scandir(self.workspace / parent) as it:
+                    names = {os.path.normcase(e.name) for e in it}
+            except OSError:  # missing dir -> none of its files exist
+                continue
+            found.update(p for p, name in entries
+                         if name in names or (self.workspace / p).exists())
+        return found
+
     def sha256(self, path: str) -> str:
         p = self.workspace / path
-        h = hashlib.sha256()
         with open(p, "rb") as f:
+            if hasattr(hashlib, "file_digest"):  # Python 3.11+: hashed straight from a reused buffer
+                return hashlib.file_digest(f, "sha256").hexdigest()
+            h = hashlib.sha256()
             for chunk in iter(lambda: f.read(65536), b""):
                 h.update(chunk)
         return h.hexdigest()
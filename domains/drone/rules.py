@@ -1,6 +1,7 @@
 
 from __future__ import annotations
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Dict, Tuple, Iterable, List
 from core.arguments import Argument, ActionSpec, VerifySpec, ArgFramework
 
@@ -9,6 +10,9 @@ from core.arguments import Argument, ActionSpec, VerifySpec, ArgFramework
 # Preconditions: none (both enabled).
 # Verify: we'll evaluate after sim for touchdown zone & final speed constraints.
 
+# Memoized per bounds (main() reruns / sweeps ask for the same AF over and over).
+# The returned framework is shared: copy args/attacks before extending them.
+@lru_cache(maxsize=32)
 def generate_landing_AF(zone_radius: float=1.0, max_speed: float=0.6, max_time: float=20.0):
     args: Dict[str, Argument] = {}
 
@@ -0,0 +1,39 @@
+# domains/plant/controllers.py
+# P-like policies with hysteresis used by the scenario-1 demos.
+# Pure scalar functions: the demos call them once per tick from their step_fn.
+
+def p_policy_cool(temp: float, target: float, tol: float, u_prev: float) -> float:
+    """Cooling-valve command for the overtemp plant."""
+    err = temp - target
+    if err > tol:
+        # stronger cooling when above band, base + proportional
+        return min(1.0, 0.10 + 0.03 * err)
+    if err < -tol:
+        # below band → stop cooling to avoid overshoot-down
+        return 0.0
+    # inside band → gently decay valve to hold position
+    return max(0.0, u_prev * 0.8)
+
+
+PHASE_SWITCH = 0.20   # when err > 0.20, use coarse (bang-bang-ish) phase
+DECAY = 0.85          # hold/decay factor inside band to avoid jitter
+
+def p_policy_pressure(p: float, target: float, tol: float,
+                      relief_prev: float, inflow_prev: float) -> tuple[float, float]:
+    """(relief, inflow) commands for the overpressure plant (two-phase with hysteresis)."""
+    err = p - target
+    if err > tol:
+        if err > PHASE_SWITCH:
+            # Phase A (coarse): get down quickly
+            return 1.0, 0.0
+        # Phase B (fine): proportional toward band
+        # stronger proportional relief; reduce inflow near 0
+        return min(1.0, 0.10 + 2.0 * err), max(0.0, 0.10 - 0.50 * err)
+    if err < -tol:
+        # below band → stop venting; restore nominal inflow gently
+        return 0.0, 0.50
+    # inside band → gently decay toward last values to hold position;
+    # drift inflow toward a mild mid value to avoid slow drift
+    target_inflow = 0.40
+    return (max(0.0, relief_prev * DECAY),
+            max(0.0, min(1.0, DECAY * inflow_prev + (1.0 - DECAY) * target_inflow)))
@@ -21,6 +21,18 @@ class PlantSim:
         dTdt = -self.k_cool * self.valve * (self.T - self.T_ambient) + self.k_heat
         self.T += dTdt * dt
 
+    def open_loop(self, dt: float):
+        """
+        Yield T, then advance one step, indefinitely (actuators held fixed).
+        Same arithmetic as step(), with the parameters bound once; self.T tracks each step.
+        """
+        T, T_amb = self.T, self.T_ambient
+        kv, k_heat = -self.k_cool * self.valve, self.k_heat
+        while True:
+            yield T
+            T += (kv * (T - T_amb) + k_heat) * dt
+            self.T = T
+
 class Sensors:
     def __init__(self, plant: PlantSim):
         self._plant = plant
@@ -0,0 +1,48 @@
+# llm/_arg_cache.py
+"""
+On-disk cache of generated arguments, keyed by provider/model/parameters + normalized intent.
+Opt-in (ISL_LLM_CACHE=1): a hit skips the LLM round-trip entirely, which would hide
+run-to-run LLM variance from tools/eval_determinism.py, so it stays off by default.
+"""
+from __future__ import annotations
+import hashlib, json, os
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+
+from core.arguments import Argument, ActionSpec, VerifySpec
+from core.logging_utils import read_json, write_json
+
+ENABLED = os.environ.get("ISL_LLM_CACHE", "0").strip().lower() in ("1", "true", "yes", "on")
+CACHE_DIR = Path(os.environ.get("ISL_LLM_CACHE_DIR", "runs/.llm_cache"))
+
+def intent_key(provider, user_intent: str) -> str:
+    """sha256 over provider class, model, sampling parameters and the case/whitespace-folded intent."""
+    norm = " ".join(user_intent.split()).lower()
+    ident = [type(provider).__name__, getattr(provider, "model", None),
+             getattr(provider, "parameters", None), norm]
+    return hashlib.sha256(json.dumps(ident, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+def _spec(cls, d):
+    # verify may be a plain {"verify_all": [...]} dict rather than a VerifySpec
+    return cls(d["name"], d.get("params", {})) if isinstance(d, dict) and "name" in d else d
+
+def _to_arg(d: dict) -> Argument:
+    d = dict(d)
+    d["pre"], d["effects"] = tuple(d["pre"]), tuple(d["effects"])
+    d["action"] = _spec(ActionSpec, d["action"])
+    d["verify"] = _spec(VerifySpec, d["verify"])
+    return Argument(**d)
+
+def get(key: str) -> Optional[Tuple[List[Argument], list]]:
+    """(args, attacks) stored under key, or None (missing or unreadable entry)."""
+    try:
+        payload = read_json(CACHE_DIR / f"{key}.json")
+        return [_to_arg(d) for d in payload["args"]], payload["attacks"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+def put(key: str, args: List[Argument], attacks: Any):
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    edges = [list(e) if isinstance(e, (list, tuple)) else e for e in (attacks or ())]
+    write_json(CACHE_DIR / f"{key}.json", {"args": [asdict(a) for a in args], "attacks": edges})
@@ -0,0 +1,80 @@
+# llm/_plan_cache.py
+"""
+Plan-template cache: generated arguments stored per intent *pattern*. Quoted names in the
+intent ('proj', "Hello ...") become slots, so "Create dir 'a' ..." and "Create dir 'b' ..."
+share one entry and a hit re-instantiates the stored arguments with the new names.
+Opt-in (ISL_PLAN_CACHE=1), for the same reason as llm._arg_cache.
+"""
+from __future__ import annotations
+import json, os, re
+from dataclasses import asdict
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from core.arguments import Argument
+from core.logging_utils import read_json, write_json
+from llm._arg_cache import intent_key, _to_arg
+
+ENABLED = os.environ.get("ISL_PLAN_CACHE", "0").strip().lower() in ("1", "true", "yes", "on")
+CACHE_DIR = Path(os.environ.get("ISL_PLAN_CACHE_DIR", "runs/plan_cache"))
+
+_QUOTED = re.compile(r"'([^']{2,})'|\"([^\"]{2,})\"")
+
+def normalize(user_intent: str) -> Tuple[str, List[str]]:
+    """(template, slots): quoted names replaced by $0, $1, ... in order of appearance."""
+    slots: List[str] = []
+    def _slot(m):
+        slots.append(m.group(1) if m.group(1) is not None else m.group(2))
+        return f"${len(slots) - 1}"
+    return _QUOTED.sub(_slot, user_intent), slots
+
+def _placeholder(i: int) -> str:
+    return f"{{{{slot{i}}}}}"
+
+def _slot_pattern(value: str):
+    # whole names only: 'proj' matches in proj/main.py, not in project/
+    return re.compile(r"(?<![\w.-])" + re.escape(value) + r"(?![\w-])")
+
+def _map_strings(obj, fn):
+    if isinstance(obj, str):
+        return fn(obj)
+    if isinstance(obj, dict):
+        return {k: _map_strings(v, fn) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_map_strings(v, fn) for v in obj]
+    return obj
+
+def get(provider, user_intent: str) -> Optional[Tuple[List[Argument], list]]:
+    """Arguments/attacks of a stored template matching user_intent's pattern, instantiated; else None."""
+    template, slots = normalize(user_intent)
+    if not slots:
+        return None  # nothing to re-instantiate: llm._arg_cache covers exact repeats
+    try:
+        payload = read_json(CACHE_DIR / f"{intent_key(provider, template)}.json")
+        if payload["n_slots"] != len(slots):
+            return None
+        fill = lambda s: re.sub(r"\{\{slot(\d+)\}\}", lambda m: slots[int(m.group(1))], s)
+        return ([_to_arg(d) for d in _map_strings(payload["args"], fill)],
+                _map_strings(payload["attacks"], fill))
+    except (OSError, ValueError, KeyError, TypeError, IndexError):
+        return None
+
+def put(provider, user_intent: str, args: List[Argument], attacks):
+    template, slots = normalize(user_intent)
+    if not slots:
+        return
+    arg_dicts = [asdict(a) for a in args]
+    if "expected_sha256" in json.dumps(arg_dicts, default=str):
+        return  # a content hash can't follow substituted names: keep such plans out
+    # longest names first, so a slot that contains another is replaced whole
+    order = sorted(range(len(slots)), key=lambda i: -len(slots[i]))
+    subs = [(_slot_pattern(slots[i]), _placeholder(i)) for i in order]
+    def strip(s):
+        for pat, ph in subs:
+            s = pat.sub(ph, s)
+        return s
+    edges = [list(e) if isinstance(e, (list, tuple)) else e for e in (attacks or ())]
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    write_json(CACHE_DIR / f"{intent_key(provider, template)}.json",
+               {"template": template, "n_slots": len(slots),
+                "args": _map_strings(arg_dicts, strip), "attacks": _map_strings(edges, strip)})
@@ -129,11 +129,10 @@ def _write_html_table(path: Path, caption: str, rows: list[list[str]], header: l
 
 
 def _write_csv(path: Path, header: list[str], rows: list[list]):
-    with path.open("w", encoding="utf-8", newline="") as fp:
+    with path.open("w", encoding="utf-8", newline="", buffering=1 << 20) as fp:
         w = csv.writer(fp)
         w.writerow(header)
-        for r in rows:
-            w.writerow(r)
+        w.writerows(rows)
 
 
 def build_latency_budget(spans_rows: list[dict], scenario_filter: str|None, ablation_filter: str|None):